@@ -4,7 +4,7 @@ import streamlit as st
 import pandas as pd
 import logging
 from urllib.parse import parse_qs
-from utils.image_utils import process_images, is_duplicate_image
+from utils.image_utils import process_images, is_duplicate_image, remember_perceptual_hash
 from utils.data_utils import save_to_snowflake, fetch_dashboard_data, update_animal_sound_enhanced
 from utils.map_utils import (
     get_animal_habitat_map, get_interactive_map_with_controls,
@@ -18,8 +18,8 @@ from utils.sound_utils import (
     prioritize_inaturalist_for_mammals
 )
 from utils.enhanced_image_processing import (
-    enhanced_image_recognition, create_user_choice_interface,
-    test_enhanced_recognition_pipeline
+    enhanced_image_recognition, enhanced_image_recognition_batch,
+    create_user_choice_interface, test_enhanced_recognition_pipeline
 )
 from utils.azure_vision import test_azure_connection
 from utils.category_utils import convert_category_name
@@ -175,19 +175,17 @@ def show_home_page():
         # Process all images with enhanced recognition
         processed_animals = []
         duplicate_animals = []
-        recognition_results = []
         
         # Progress bar for processing
         progress_bar = st.progress(0)
         
-        for idx, uploaded_file in enumerate(uploaded_files):
-            progress = (idx + 0.5) / len(uploaded_files)
-            progress_bar.progress(progress)
-            
-            # Enhanced recognition pipeline
-            recognition_result = enhanced_image_recognition(uploaded_file)
-            recognition_results.append(recognition_result)
-            
+        # Enhanced recognition pipeline, run concurrently across uploads
+        recognition_results = enhanced_image_recognition_batch(
+            uploaded_files,
+            progress_callback=lambda done, total: progress_bar.progress(done / total)
+        )
+        
+        for uploaded_file, recognition_result in zip(uploaded_files, recognition_results):
             if recognition_result.get('is_duplicate'):
                 duplicate_animals.append({
                     'file': uploaded_file,
@@ -195,9 +193,6 @@ def show_home_page():
                 })
             elif recognition_result.get('success'):
                 processed_animals.append(recognition_result)
-            
-            progress = (idx + 1) / len(uploaded_files)
-            progress_bar.progress(progress)
         
         # Clear progress indicators
         progress_bar.empty()
@@ -329,6 +324,9 @@ def show_home_page():
                                 add_progress_bar.progress(100)
                                 
                                 if result and result.get('success'):
+                                    # Only saved images count for near-duplicate detection
+                                    remember_perceptual_hash(recognition_result.get('perceptual_hash'), animal_file.name)
+                                    
                                     # Show comprehensive success message with details
                                     st.success(f"{final_choice['name']} successfully added to your collection!")
                                     
@@ -441,19 +439,17 @@ def show_dashboard_page():
         # Process all images with enhanced recognition
         processed_animals = []
         duplicate_animals = []
-        recognition_results = []
         
         # Progress bar for processing
         progress_bar = st.progress(0)
         
-        for idx, uploaded_file in enumerate(uploaded_files):
-            progress = (idx + 0.5) / len(uploaded_files)
-            progress_bar.progress(progress)
-            
-            # Enhanced recognition pipeline
-            recognition_result = enhanced_image_recognition(uploaded_file)
-            recognition_results.append(recognition_result)
-            
+        # Enhanced recognition pipeline, run concurrently across uploads
+        recognition_results = enhanced_image_recognition_batch(
+            uploaded_files,
+            progress_callback=lambda done, total: progress_bar.progress(done / total)
+        )
+        
+        for uploaded_file, recognition_result in zip(uploaded_files, recognition_results):
             if recognition_result.get('is_duplicate'):
                 duplicate_animals.append({
                     'file': uploaded_file,
@@ -461,9 +457,6 @@ def show_dashboard_page():
                 })
             elif recognition_result.get('success'):
                 processed_animals.append(recognition_result)
-            
-            progress = (idx + 1) / len(uploaded_files)
-            progress_bar.progress(progress)
         
         # Clear progress indicators
         progress_bar.empty()
@@ -595,6 +588,9 @@ def show_dashboard_page():
                                 add_progress_bar.progress(100)
                                 
                                 if result and result.get('success'):
+                                    # Only saved images count for near-duplicate detection
+                                    remember_perceptual_hash(recognition_result.get('perceptual_hash'), animal_file.name)
+                                    
                                     # Show comprehensive success message with details
                                     st.success(f"{final_choice['name']} successfully added to your collection!")
                                     
@@ -200,8 +200,6 @@ class DashboardSoundManager:
         except Exception as e:
             logger.error(f"Error getting dashboard sound status: {str(e)}")
             return {"error": str(e)}
-        finally:
-            conn.close()
     
     def get_animals_without_sounds(self, limit=50):
         """
@@ -243,8 +241,6 @@ class DashboardSoundManager:
         except Exception as e:
             logger.error(f"Error getting animals without sounds: {str(e)}")
             return []
-        finally:
-            conn.close()
     
     def test_sound_sources(self, test_animal="robin"):
         """
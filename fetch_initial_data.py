@@ -1,7 +1,7 @@
 import requests
 import json
 import time
-from utils.data_utils import save_inaturalist_data_to_snowflake, get_snowflake_connection
+from utils.data_utils import save_inaturalist_data_to_snowflake, save_many_inaturalist_records, get_snowflake_connection
 import logging
 
 # Enable detailed logging
@@ -122,6 +122,12 @@ def fetch_inaturalist_observations(taxon_name="Canis lupus", limit=50):
 
 def save_observations_to_database(observations):
     """Save all observations to Snowflake database"""
+    # Load everything in one staged COPY; fall back to row-by-row inserts if it fails
+    loaded = save_many_inaturalist_records(observations)
+    if loaded:
+        logger.info(f"Database save complete: {loaded} successful, {len(observations) - loaded} errors")
+        return loaded, len(observations) - loaded
+    
     success_count = 0
     error_count = 0
     
@@ -2,7 +2,7 @@ import time
 import io
 from PIL import Image
 import streamlit as st
-from utils.image_utils import process_images_in_chunks, process_images, is_duplicate_image
+from utils.image_utils import process_images_in_chunks, process_images, is_duplicate_image, CHUNK_TIMEOUT_RESULT
 
 def create_mock_uploaded_file(name, width=100, height=100, color=(255, 0, 0)):
     """Create a mock uploaded file for testing"""
@@ -106,10 +106,30 @@ def test_process_images_in_chunks():
         ]
         # Use very short timeout to trigger timeout warning
         results = process_images_in_chunks(timeout_files, chunk_size=10, timeout=0.001)
-        st.warning(f"Timeout test completed. Processed {len(results)} out of {len(timeout_files)} images")
-        st.info("Check above for timeout warnings from Streamlit")
+        timed_out = sum(result == CHUNK_TIMEOUT_RESULT for result in results)
+        if len(results) == len(timeout_files):
+            st.success(f"✅ Timeout test passed! {timed_out} of {len(timeout_files)} images timed out, one result per file")
+        else:
+            st.error(f"❌ Timeout test failed: Expected {len(timeout_files)} results, got {len(results)}")
     except Exception as e:
         st.error(f"❌ Timeout test failed: {str(e)}")
+    
+    # Test 6: Undecodable file keeps its slot
+    st.subheader("Test 6: Undecodable File")
+    try:
+        mixed_files = [
+            create_mock_uploaded_file("before.png", 200, 100),
+            create_mock_uploaded_file("broken.png", 100, 100),
+            create_mock_uploaded_file("after.png", 100, 200),
+        ]
+        mixed_files[1].data = b"not an image"
+        results = process_images_in_chunks(mixed_files, chunk_size=5, timeout=10)
+        if len(results) == len(mixed_files) and results[1][0] == "Processing Error":
+            st.success("✅ Undecodable file test passed! Each result stays with its file")
+        else:
+            st.error(f"❌ Undecodable file test failed: Expected {len(mixed_files)} aligned results, got {results}")
+    except Exception as e:
+        st.error(f"❌ Undecodable file test failed: {str(e)}")
 
 def test_individual_functions():
     """Test individual functions used by process_images_in_chunks"""
@@ -2,12 +2,18 @@
 
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import logging
 from typing import Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Shared keep-alive session so each analysis reuses a warm TLS connection
+# to the Azure endpoint; pool sized for concurrent batch recognition
+_azure_http = requests.Session()
+_azure_http.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
 def get_azure_image_analysis(image_data) -> Dict:
     """
     Analyze image using Azure Computer Vision API
@@ -64,7 +70,7 @@ def get_azure_image_analysis(image_data) -> Dict:
         
         # Make API request
         logger.info("Sending image to Azure Computer Vision for analysis...")
-        response = requests.post(analyze_url, headers=headers, params=params, data=image_bytes)
+        response = _azure_http.post(analyze_url, headers=headers, params=params, data=image_bytes, timeout=30)
         
         if response.status_code == 200:
             result = response.json()
@@ -347,7 +353,7 @@ def test_azure_connection() -> Dict:
         test_url = f"{endpoint.rstrip('/')}/vision/v3.2/"
         headers = {'Ocp-Apim-Subscription-Key': key}
         
-        response = requests.get(test_url, headers=headers, timeout=10)
+        response = _azure_http.get(test_url, headers=headers, timeout=10)
         
         return {
             'success': True,
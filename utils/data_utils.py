@@ -9,14 +9,82 @@ import requests
 import json
 import re
 import time
+import concurrent.futures
+import functools
+import threading
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from groq import Groq
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+try:
+    from diskcache import Cache
+    _lookup_cache = Cache(".cache/naturetrace_geo")
+except ImportError:
+    _lookup_cache = None
 
 # Enable detailed logging for Snowflake connections
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# How long lookups persisted to disk stay valid (seconds)
+LOOKUP_DISK_CACHE_EXPIRE = 30 * 24 * 3600
 
+def _disk_memoize(func):
+    """
+    Persist successful results of a lookup on disk so they survive app restarts
+    
+    Keys are the function name plus its lower-cased string arguments; None
+    results (not found or failed) are never stored. Without diskcache
+    installed the function is returned unchanged.
+    """
+    if _lookup_cache is None:
+        return func
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        normalized = tuple(arg.lower().strip() if isinstance(arg, str) else arg for arg in args)
+        key = (func.__name__, normalized, tuple(sorted(kwargs.items())))
+        result = _lookup_cache.get(key)
+        if result is not None:
+            return result
+        
+        result = func(*args, **kwargs)
+        if result is not None:
+            _lookup_cache.set(key, result, expire=LOOKUP_DISK_CACHE_EXPIRE)
+        return result
+    
+    return wrapper
+
+# Shared HTTP session so Wikipedia, Nominatim and iNaturalist lookups reuse
+# pooled keep-alive connections instead of a new TCP+TLS handshake per call
+_http = requests.Session()
+_http.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+))
+_http.headers.update({
+    'User-Agent': 'NatureTrace/1.0 (flora.jiang1990@gmail.com)'
+})
+
+
+def _is_open_connection(conn):
+    """Check whether a cached Snowflake connection can still be used"""
+    return conn is not None and not conn.is_closed()
+
+@st.cache_resource(validate=_is_open_connection)
 def get_snowflake_connection():
+    """
+    Return the shared Snowflake connection, connecting on first use
+    
+    The connection is cached for the whole process; callers must not close
+    it. A failed or closed connection is replaced on the next call.
+    """
     try:
         # Connect with FLORA0122 using ANIMAL_APP_ROLE
         conn = snowflake.connector.connect(
@@ -25,7 +93,11 @@ def get_snowflake_connection():
             account=st.secrets["snowflake_account"],
             warehouse=st.secrets["snowflake_warehouse"],
             role=st.secrets["snowflake_role"],
-            autocommit=True
+            autocommit=True,
+            # The connection is cached for the life of the process; keep its session
+            # token alive so an idle app doesn't end up holding an expired session
+            # that still reports itself open
+            client_session_keep_alive=True
         )
         
         logger.info("Successfully connected to Snowflake")
@@ -51,6 +123,41 @@ def get_snowflake_connection():
         return None
 
 
+# Filenames already stored, reloaded from Snowflake at most once per TTL so
+# duplicate checks for a batch of uploads cost one query instead of one per file
+FILENAME_CACHE_TTL = 60
+_filename_cache = {"ts": 0.0, "names": set()}
+_filename_cache_lock = threading.Lock()
+
+def filename_exists(filename):
+    """
+    Check whether an image filename is already stored in animal_insight_data
+    
+    Args:
+        filename: Image filename to look up
+    
+    Returns:
+        bool: True if stored, or None if Snowflake is not configured
+    """
+    with _filename_cache_lock:
+        if time.monotonic() - _filename_cache["ts"] > FILENAME_CACHE_TTL:
+            conn = get_snowflake_connection()
+            if not conn:
+                return None
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT DISTINCT filename FROM animal_insight_data")
+                _filename_cache["names"] = {row[0] for row in cursor}
+                _filename_cache["ts"] = time.monotonic()
+            finally:
+                cursor.close()
+        return filename in _filename_cache["names"]
+
+def _remember_filenames(*filenames):
+    """Record newly inserted filenames so the next duplicate check sees them without a reload"""
+    with _filename_cache_lock:
+        _filename_cache["names"].update(name for name in filenames if name)
+
 def create_table_if_not_exists():
     """Create the animal_insight_data table if it doesn't exist"""
     conn = get_snowflake_connection()
@@ -89,8 +196,6 @@ def create_table_if_not_exists():
         # If table creation fails, just log and continue - table might already exist
         print(f"Note: Table creation attempt: {e}")
         return True  # Return True to continue with the app
-    finally:
-        conn.close()
 
 def save_to_snowflake(filename, name, description, facts, sound_url="", category=None, inatural_pic=None, wikipedia_url=None, original_image=None, species=None, summary=None, fetch_sound=True, fetch_location=True):
     """
@@ -148,12 +253,61 @@ def save_inaturalist_data_to_snowflake(data_record):
             data_record.get('place_guess', '')
         ))
         cursor.close()
+        _remember_filenames(data_record.get('filename', ''))
         return True
     except Exception as e:
         print(f"Error inserting iNaturalist data into Snowflake: {e}")
         return False
-    finally:
-        conn.close()
+
+# Columns written by the iNaturalist ingest paths, in table order
+INATURALIST_RECORD_COLUMNS = [
+    'filename', 'name', 'description', 'facts', 'sound_url',
+    'category', 'inatural_pic', 'wikipedia_url', 'original_image', 'species', 'summary',
+    'latitude', 'longitude', 'location_string', 'place_guess'
+]
+
+def save_many_inaturalist_records(records):
+    """
+    Bulk-save iNaturalist records to Snowflake in one staged load
+    
+    The records are written as a parquet file to a temporary stage and
+    loaded with COPY INTO via write_pandas, instead of one INSERT per record.
+    
+    Args:
+        records: List of data_record dicts as accepted by save_inaturalist_data_to_snowflake
+    
+    Returns:
+        int: Number of rows loaded (0 if the load failed)
+    """
+    if not records:
+        return 0
+    
+    conn = get_snowflake_connection()
+    if not conn:
+        return 0
+    
+    try:
+        from snowflake.connector.pandas_tools import write_pandas
+        
+        df = pd.DataFrame.from_records(records).reindex(columns=INATURALIST_RECORD_COLUMNS)
+        text_columns = [col for col in INATURALIST_RECORD_COLUMNS if col not in ('latitude', 'longitude')]
+        df[text_columns] = df[text_columns].fillna('')
+        df[['latitude', 'longitude']] = df[['latitude', 'longitude']].astype(float)
+        
+        success, _, nrows, _ = write_pandas(
+            conn,
+            df,
+            'ANIMAL_INSIGHT_DATA',
+            quote_identifiers=False,
+            chunk_size=16000,
+            compression='snappy'
+        )
+        if success:
+            _remember_filenames(*df['filename'])
+        return nrows if success else 0
+    except Exception as e:
+        print(f"Error bulk loading iNaturalist data into Snowflake: {e}")
+        return 0
 
 def fetch_dashboard_data():
     conn = get_snowflake_connection()
@@ -192,8 +346,91 @@ def fetch_dashboard_data():
         except Exception as create_error:
             st.error(f"Table doesn't exist and cannot be created. Please contact your Snowflake administrator to create the 'animal_insight_data' table in the ANIMAL_DB.INSIGHTS schema.")
             return pd.DataFrame()
-    finally:
-        conn.close()
+
+def _detect_sound_source(sound_url):
+    """Determine the sound source from the host of a sound URL"""
+    if 'xeno-canto.org' in sound_url:
+        return 'xeno_canto'
+    elif 'static.inaturalist.org' in sound_url:
+        return 'inaturalist'
+    elif 'cdn.download.ams.birds.cornell.edu' in sound_url:
+        return 'macaulay'
+    elif 'huggingface.co' in sound_url:
+        return 'huggingface'
+    elif 'archive.org' in sound_url:
+        return 'internet_archive'
+    return 'unknown'
+
+def _fetch_sound_for_animal(animal_name, animal_type="unknown"):
+    """
+    Fetch a sound URL for an animal using the enhanced sound fetcher
+    
+    Returns:
+        tuple: (sound_url, source) or (None, None) if no sound was found
+    """
+    from utils.sound_utils import sound_fetcher
+    logger.info(f"Fetching sound for {animal_name} (type: {animal_type})")
+    
+    fetched_url = sound_fetcher.fetch_sound(
+        animal_name, 
+        max_duration=30, 
+        animal_type=animal_type
+    )
+    
+    if not fetched_url:
+        return None, None
+    return fetched_url, _detect_sound_source(fetched_url)
+
+# Rows per MERGE statement when writing sound URLs back in bulk
+SOUND_MERGE_BATCH_SIZE = 500
+
+def _merge_sound_urls(cursor, updates, match_on="id"):
+    """
+    Write sound URLs back to the database with one MERGE per batch of rows
+    
+    Args:
+        cursor: Open Snowflake cursor
+        updates: List of (key, sound_url, source) tuples
+        match_on: "id" to match rows by animal ID, "name" to match by animal name
+    
+    Returns:
+        int: Number of rows updated
+    """
+    if match_on == "name":
+        # Keys are upper-cased in Python so only the column side needs UPPER()
+        condition = "UPPER(t.name) = s.animal_key"
+        updates = [(key.upper(), url, src) for key, url, src in updates]
+    else:
+        condition = "t.id = s.animal_key"
+    # MERGE rejects a source with repeated keys, so keep one update per key (the last wins)
+    updates = list({update[0]: update for update in updates}.values())
+    
+    affected_rows = 0
+    for start in range(0, len(updates), SOUND_MERGE_BATCH_SIZE):
+        batch = updates[start:start + SOUND_MERGE_BATCH_SIZE]
+        values_sql = ", ".join(["(%s, %s, %s)"] * len(batch))
+        params = [value for update in batch for value in update]
+        source_sql = f"SELECT column1 AS animal_key, column2 AS url, column3 AS src FROM VALUES {values_sql}"
+        
+        # Try to update with new columns first, fallback to old structure
+        try:
+            cursor.execute(f"""
+                MERGE INTO animal_insight_data t
+                USING ({source_sql}) s
+                ON {condition}
+                WHEN MATCHED THEN UPDATE SET sound_url = s.url, sound_source = s.src, sound_updated = CURRENT_TIMESTAMP()
+            """, params)
+        except Exception:
+            # Fallback to basic update if new columns don't exist
+            cursor.execute(f"""
+                MERGE INTO animal_insight_data t
+                USING ({source_sql}) s
+                ON {condition}
+                WHEN MATCHED THEN UPDATE SET sound_url = s.url
+            """, params)
+        affected_rows += cursor.rowcount or 0
+    
+    return affected_rows
 
 def update_animal_sound_url(animal_id=None, animal_name=None, sound_url=None, source=None):
     """
@@ -214,6 +451,7 @@ def update_animal_sound_url(animal_id=None, animal_name=None, sound_url=None, so
     
     try:
         cursor = conn.cursor()
+        animal_type = "unknown"
         
         # Get animal information if not provided
         if animal_id and not animal_name:
@@ -223,43 +461,19 @@ def update_animal_sound_url(animal_id=None, animal_name=None, sound_url=None, so
                 animal_name, animal_type = result
             else:
                 return {"success": False, "sound_url": None, "source": None, "message": f"Animal with ID {animal_id} not found"}
-        elif animal_name and not animal_id:
-            cursor.execute("SELECT id, category FROM animal_insight_data WHERE UPPER(name) = UPPER(%s) LIMIT 1", (animal_name,))
+        elif animal_name and not animal_id and not sound_url:
+            # The category is only needed to pick a sound source; with a URL
+            # already in hand the MERGE below resolves the row by name itself
+            cursor.execute("SELECT id, category FROM animal_insight_data WHERE UPPER(name) = %s LIMIT 1", (animal_name.upper(),))
             result = cursor.fetchone()
             if result:
                 animal_id, animal_type = result
-            else:
-                animal_type = "unknown"
         
         # If no sound URL provided, fetch one
         if not sound_url:
             try:
-                from utils.sound_utils import sound_fetcher
-                logger.info(f"Fetching sound for {animal_name} (type: {animal_type if 'animal_type' in locals() else 'unknown'})")
-                
-                # Use the enhanced sound fetcher
-                fetched_url = sound_fetcher.fetch_sound(
-                    animal_name, 
-                    max_duration=30, 
-                    animal_type=animal_type if 'animal_type' in locals() else "unknown"
-                )
-                
-                if fetched_url:
-                    sound_url = fetched_url
-                    # Determine source from URL
-                    if 'xeno-canto.org' in sound_url:
-                        source = 'xeno_canto'
-                    elif 'static.inaturalist.org' in sound_url:
-                        source = 'inaturalist'
-                    elif 'cdn.download.ams.birds.cornell.edu' in sound_url:
-                        source = 'macaulay'
-                    elif 'huggingface.co' in sound_url:
-                        source = 'huggingface'
-                    elif 'archive.org' in sound_url:
-                        source = 'internet_archive'
-                    else:
-                        source = 'unknown'
-                else:
+                sound_url, source = _fetch_sound_for_animal(animal_name, animal_type or "unknown")
+                if not sound_url:
                     return {"success": False, "sound_url": None, "source": None, "message": f"No sound found for {animal_name}"}
                     
             except Exception as e:
@@ -267,37 +481,9 @@ def update_animal_sound_url(animal_id=None, animal_name=None, sound_url=None, so
         
         # Update the database with the sound URL
         if animal_id:
-            # Try to update with new columns first, fallback to old structure
-            try:
-                cursor.execute("""
-                    UPDATE animal_insight_data 
-                    SET sound_url = %s, sound_source = %s, sound_updated = CURRENT_TIMESTAMP()
-                    WHERE id = %s
-                """, (sound_url, source, animal_id))
-            except:
-                # Fallback to basic update if new columns don't exist
-                cursor.execute("""
-                    UPDATE animal_insight_data 
-                    SET sound_url = %s
-                    WHERE id = %s
-                """, (sound_url, animal_id))
+            affected_rows = _merge_sound_urls(cursor, [(animal_id, sound_url, source)])
         else:
-            # Try to update with new columns first, fallback to old structure
-            try:
-                cursor.execute("""
-                    UPDATE animal_insight_data 
-                    SET sound_url = %s, sound_source = %s, sound_updated = CURRENT_TIMESTAMP()
-                    WHERE UPPER(name) = UPPER(%s)
-                """, (sound_url, source, animal_name))
-            except:
-                # Fallback to basic update if new columns don't exist
-                cursor.execute("""
-                    UPDATE animal_insight_data 
-                    SET sound_url = %s
-                    WHERE UPPER(name) = UPPER(%s)
-                """, (sound_url, animal_name))
-        
-        affected_rows = cursor.rowcount
+            affected_rows = _merge_sound_urls(cursor, [(animal_name, sound_url, source)], match_on="name")
         cursor.close()
         
         if affected_rows > 0:
@@ -317,13 +503,14 @@ def update_animal_sound_url(animal_id=None, animal_name=None, sound_url=None, so
             
     except Exception as e:
         return {"success": False, "sound_url": None, "source": None, "message": f"Database error: {str(e)}"}
-    finally:
-        conn.close()
 
 def bulk_update_missing_sounds(limit=None):
     """
     Update sound URLs for all animals in the database that don't have sounds
     
+    Sounds are fetched per animal, then written back with a single MERGE
+    rather than one connection and UPDATE per animal.
+    
     Args:
         limit: Maximum number of animals to process (None for all)
         
@@ -348,52 +535,56 @@ def bulk_update_missing_sounds(limit=None):
             query += f" LIMIT {limit}"
         
         cursor.execute(query)
-        animals = cursor.fetchall()
-        cursor.close()
         
         results = []
-        successful = 0
-        failed = 0
+        updates = []
         
-        for animal_id, name, category in animals:
+        # Iterate the cursor directly so rows stream in result chunks instead
+        # of being materialised up front with fetchall()
+        for animal_id, name, category in cursor:
             logger.info(f"Processing sound for: {name} (ID: {animal_id})")
             
-            result = update_animal_sound_url(
-                animal_id=animal_id, 
-                animal_name=name
-            )
+            try:
+                sound_url, source = _fetch_sound_for_animal(name, category or "unknown")
+                message = f"Sound URL updated successfully for {name}" if sound_url else f"No sound found for {name}"
+            except Exception as e:
+                sound_url, source = None, None
+                message = f"Error fetching sound: {str(e)}"
+            
+            if sound_url:
+                updates.append((animal_id, sound_url, source))
             
             results.append({
                 "id": animal_id,
                 "name": name,
-                "success": result["success"],
-                "sound_url": result["sound_url"],
-                "source": result["source"],
-                "message": result["message"]
+                "success": bool(sound_url),
+                "sound_url": sound_url,
+                "source": source,
+                "message": message
             })
-            
-            if result["success"]:
-                successful += 1
-            else:
-                failed += 1
-                
+        
+        _merge_sound_urls(cursor, updates)
+        cursor.close()
+        
+        successful = len(updates)
         return {
-            "total_processed": len(animals),
+            "total_processed": len(results),
             "successful": successful,
-            "failed": failed,
+            "failed": len(results) - successful,
             "results": results
         }
         
     except Exception as e:
         logger.error(f"Bulk sound update error: {str(e)}")
         return {"total_processed": 0, "successful": 0, "failed": 0, "results": []}
-    finally:
-        conn.close()
 
 def save_to_snowflake_with_sound(filename, name, description, facts, category=None, inatural_pic=None, wikipedia_url=None, original_image=None, species=None, summary=None, fetch_sound=True, fetch_location=True):
     """
     Save animal data to Snowflake and automatically fetch sound and location if requested
     
+    Location and sound are fetched concurrently before the database is
+    touched, and the row is written with both in a single INSERT.
+    
     Args:
         All the standard save_to_snowflake parameters plus:
         fetch_sound: Boolean to determine if sound should be automatically fetched
@@ -406,22 +597,51 @@ def save_to_snowflake_with_sound(filename, name, description, facts, category=No
     if not create_table_if_not_exists():
         return {"success": False, "animal_id": None, "sound_result": None, "location_result": None}
     
-    # Fetch location data first if requested
     location_data = None
     location_result = {"success": False, "source": None}
+    sound_url, sound_source = None, None
+    sound_result = None
     
-    if fetch_location and name:
-        logger.info(f"Fetching location data for {name}...")
-        location_data = fetch_location_for_animal(name, category)
-        if location_data:
-            location_result = {
-                "success": True, 
-                "source": location_data.get("source", "Unknown"),
-                "location": location_data.get("place_guess", "Unknown location")
-            }
-            logger.info(f"Found location for {name}: {location_data.get('place_guess', 'coordinates only')}")
-        else:
-            logger.warning(f"No location data found for {name}")
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        location_future = None
+        sound_future = None
+        if fetch_location and name:
+            logger.info(f"Fetching location data for {name}...")
+            location_future = executor.submit(fetch_location_for_animal, name, category)
+        if fetch_sound and name:
+            logger.info(f"Fetching enhanced sound for {name}...")
+            sound_future = executor.submit(_fetch_enhanced_sound, name)
+        
+        if location_future:
+            location_data = location_future.result()
+            if location_data:
+                location_result = {
+                    "success": True, 
+                    "source": location_data.get("source", "Unknown"),
+                    "location": location_data.get("place_guess", "Unknown location")
+                }
+                logger.info(f"Found location for {name}: {location_data.get('place_guess', 'coordinates only')}")
+            else:
+                logger.warning(f"No location data found for {name}")
+        
+        if sound_future:
+            try:
+                sound_url, sound_source, processed = sound_future.result()
+                if sound_url:
+                    sound_result = {
+                        "success": True, 
+                        "sound_url": sound_url, 
+                        "source": sound_source, 
+                        "message": f"Enhanced sound data updated for {name}",
+                        "processed": processed
+                    }
+                else:
+                    sound_result = {"success": False, "sound_url": None, "source": None, "message": f"No sound found for {name}"}
+            except Exception as e:
+                sound_result = {"success": False, "sound_url": None, "source": None, "message": f"Error fetching sound: {str(e)}"}
+    
+    # Only record the sound source when the columns for it exist
+    record_sound_source = bool(sound_url) and ensure_sound_columns_exist()
     
     conn = get_snowflake_connection()
     if not conn:
@@ -430,45 +650,38 @@ def save_to_snowflake_with_sound(filename, name, description, facts, category=No
     try:
         cursor = conn.cursor()
         
-        # Insert the animal data with location if available
+        # Insert the animal data with location and sound if available
+        columns = ["filename", "name", "description", "facts", "sound_url", "category",
+                   "inatural_pic", "wikipedia_url", "original_image", "species", "summary"]
+        values = [filename, name, description, facts, sound_url or "", category,
+                  inatural_pic, wikipedia_url, original_image, species, summary]
+        placeholders = ["%s"] * len(columns)
+        
         if location_data:
-            cursor.execute("""
-                INSERT INTO animal_insight_data (
-                    filename, name, description, facts, sound_url, category, 
-                    inatural_pic, wikipedia_url, original_image, species, summary,
-                    latitude, longitude, location_string, place_guess
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                filename, name, description, facts, "", category, 
-                inatural_pic, wikipedia_url, original_image, species, summary,
+            columns += ["latitude", "longitude", "location_string", "place_guess"]
+            values += [
                 location_data.get('latitude'), location_data.get('longitude'),
                 location_data.get('location_string', ''), location_data.get('place_guess', '')
-            ))
-        else:
-            # Insert without location data
-            cursor.execute("""
-                INSERT INTO animal_insight_data (filename, name, description, facts, sound_url, category, inatural_pic, wikipedia_url, original_image, species, summary)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (filename, name, description, facts, "", category, inatural_pic, wikipedia_url, original_image, species, summary))
+            ]
+            placeholders += ["%s"] * 4
+        
+        if record_sound_source:
+            columns += ["sound_source", "sound_updated"]
+            values.append(sound_source)
+            placeholders += ["%s", "CURRENT_TIMESTAMP()"]
         
-        # Get the inserted animal's ID using Snowflake syntax
-        cursor.execute("SELECT id FROM animal_insight_data WHERE filename = %s ORDER BY timestamp DESC LIMIT 1", (filename,))
+        cursor.execute(f"""
+            INSERT INTO animal_insight_data ({", ".join(columns)})
+            VALUES ({", ".join(placeholders)})
+        """, values)
+        
+        # Snowflake has no INSERT ... RETURNING; AUTOINCREMENT ids only grow, so
+        # MAX(id) for the filename is the row just inserted without sorting on timestamp
+        cursor.execute("SELECT MAX(id) FROM animal_insight_data WHERE filename = %s", (filename,))
         result = cursor.fetchone()
         animal_id = result[0] if result else None
         cursor.close()
-        
-        # Fetch and update sound if requested using enhanced logic
-        sound_result = None
-        if fetch_sound and name:
-            logger.info(f"� Fetching enhanced sound for {name}...")
-            sound_result = update_animal_sound_enhanced(
-                animal_id=animal_id, 
-                animal_name=name,
-                sound_url=None,  # Let it fetch automatically
-                source=None,     # Let it determine source
-                processed=False  # Will be determined by the function
-            )
+        _remember_filenames(filename)
         
         return {
             "success": True,
@@ -480,8 +693,6 @@ def save_to_snowflake_with_sound(filename, name, description, facts, category=No
     except Exception as e:
         logger.error(f"Error inserting into Snowflake with enhancements: {e}")
         return {"success": False, "animal_id": None, "sound_result": None, "location_result": location_result}
-    finally:
-        conn.close()
 
 def get_animal_database_knowledge():
     """
@@ -513,35 +724,38 @@ def get_animal_database_knowledge():
         """
         
         cursor.execute(query)
-        results = cursor.fetchall()
+        df = cursor.fetch_pandas_all()
         
         animal_knowledge = {}
+        if df.empty:
+            logger.info("Loaded knowledge for 0 unique animals from database")
+            return animal_knowledge
         
-        for row in results:
-            animal_name, description, inatural_pic, original_image, species, summary, category, facts = row
-            
-            # Create variations of the animal name for better matching
-            base_name = animal_name.lower()
-            name_variations = [
-                base_name,
-                base_name.replace(" ", ""),
-                base_name.replace("-", " "),
-                base_name.replace("_", " "),
-            ]
-            
-            # Also add individual words for partial matching
-            words = base_name.split()
-            name_variations.extend(words)
+        # Create variations of the animal name for better matching, column-wise
+        df['BASE_NAME'] = df['ANIMAL_NAME'].str.lower()
+        df['NO_SPACES'] = df['BASE_NAME'].str.replace(" ", "", regex=False)
+        df['DASHES_TO_SPACES'] = df['BASE_NAME'].str.replace("-", " ", regex=False)
+        df['UNDERSCORES_TO_SPACES'] = df['BASE_NAME'].str.replace("_", " ", regex=False)
+        # Also add individual words for partial matching
+        df['WORDS'] = df['BASE_NAME'].str.split()
+        
+        text_columns = ['DESCRIPTION', 'INATURAL_PIC', 'ORIGINAL_IMAGE', 'SPECIES', 'SUMMARY', 'FACTS']
+        df[text_columns] = df[text_columns].fillna('')
+        df['CATEGORY'] = df['CATEGORY'].fillna('').replace('', 'Unknown')
+        
+        for row in df.itertuples(index=False):
+            base_name = row.BASE_NAME
+            name_variations = [base_name, row.NO_SPACES, row.DASHES_TO_SPACES, row.UNDERSCORES_TO_SPACES] + row.WORDS
             
             animal_data = {
-                'name': animal_name,
-                'description': description or '',
-                'inatural_pic': inatural_pic or '',
-                'original_image': original_image or '',
-                'species': species or '',
-                'summary': summary or '',
-                'category': category or 'Unknown',
-                'facts': facts or '',
+                'name': row.ANIMAL_NAME,
+                'description': row.DESCRIPTION,
+                'inatural_pic': row.INATURAL_PIC,
+                'original_image': row.ORIGINAL_IMAGE,
+                'species': row.SPECIES,
+                'summary': row.SUMMARY,
+                'category': row.CATEGORY,
+                'facts': row.FACTS,
                 'name_variations': name_variations
             }
             
@@ -559,7 +773,6 @@ def get_animal_database_knowledge():
         return {}
     finally:
         cursor.close()
-        conn.close()
 
 def match_detected_animal_to_database(detected_animal, confidence, animal_knowledge):
     """
@@ -605,15 +818,6 @@ def match_detected_animal_to_database(detected_animal, confidence, animal_knowle
         logger.info(f"� Partial database match: {detected_animal} -> {best_match['name']} (score: {best_score:.2f})")
         return best_match, enhanced_confidence, "partial_match"
     
-    # Category-based fallback matching
-    detected_category = None
-    if detected_lower in ['cat', 'dog', 'bird', 'horse', 'cow', 'sheep', 'elephant', 'bear', 'zebra', 'giraffe']:
-        # Look for animals in the same YOLO category
-        for animal_data in animal_knowledge.values():
-            if animal_data.get('category', '').lower() == 'mammal' and detected_lower in ['cat', 'dog', 'horse', 'cow', 'sheep', 'elephant', 'bear', 'zebra', 'giraffe']:
-                # Could potentially match - but keep original detection
-                pass
-    
     return None, confidence, "no_match"
 
 def get_enhanced_animal_description(animal_data, detected_confidence):
@@ -630,29 +834,122 @@ def get_enhanced_animal_description(animal_data, detected_confidence):
     
     name = animal_data['name']
     category = animal_data.get('category', 'Unknown')
+    species = animal_data.get('species')
+    summary = animal_data.get('summary') or ''
+    facts = animal_data.get('facts') or ''
     
-    # Build comprehensive description from available data
-    description_parts = []
+    # Build comprehensive description from available data, taking the first
+    # 200 characters of the summary and 150 of the facts
+    description_parts = [
+        animal_data.get('description'),
+        species and f"Species info: {species}",
+        summary[:200] + "..." if len(summary) > 200 else summary,
+        facts and f"Additional info: {facts[:150] + '...' if len(facts) > 150 else facts}",
+    ]
     
-    if animal_data.get('description'):
-        description_parts.append(animal_data['description'])
+    enhanced_description = " | ".join(part for part in description_parts if part) or f"A {category.lower()} species identified using database knowledge."
+    enhanced_description += f" (Detected with {detected_confidence:.1%} confidence using enhanced AI analysis)"
     
-    if animal_data.get('species'):
-        description_parts.append(f"Species info: {animal_data['species']}")
+    return name, enhanced_description, category
+
+def get_enhanced_animal_descriptions_df(df, confidences):
+    """
+    Batched get_enhanced_animal_description for many matched animals at once
+    Args:
+        df: DataFrame with description, species, summary, facts and category columns
+        confidences: Detection confidences aligned with the rows of df
+    Returns:
+        pd.Series: Enhanced descriptions indexed like df
+    """
+    text = df[['description', 'species', 'summary', 'facts']].fillna('').astype(str)
     
-    if animal_data.get('summary'):
-        # Take first 200 characters of summary
-        summary_excerpt = animal_data['summary'][:200] + "..." if len(animal_data['summary']) > 200 else animal_data['summary']
-        description_parts.append(summary_excerpt)
+    summary = text['summary'].str.slice(0, 200)
+    summary = summary.where(text['summary'].str.len() <= 200, summary + "...")
+    facts = text['facts'].str.slice(0, 150)
+    facts = facts.where(text['facts'].str.len() <= 150, facts + "...")
     
-    if animal_data.get('facts'):
-        facts_excerpt = animal_data['facts'][:150] + "..." if len(animal_data['facts']) > 150 else animal_data['facts']
-        description_parts.append(f"Additional info: {facts_excerpt}")
+    description_parts = [
+        text['description'],
+        ("Species info: " + text['species']).where(text['species'] != '', ''),
+        summary,
+        ("Additional info: " + facts).where(text['facts'] != '', ''),
+    ]
     
-    enhanced_description = " | ".join(description_parts) if description_parts else f"A {category.lower()} species identified using database knowledge."
-    enhanced_description += f" (Detected with {detected_confidence:.1%} confidence using enhanced AI analysis)"
+    # Join the non-empty parts with " | " using column-wise masks
+    enhanced_description = description_parts[0]
+    for part in description_parts[1:]:
+        separator = (enhanced_description.ne('') & part.ne('')).map({True: " | ", False: ""})
+        enhanced_description = enhanced_description + separator + part
     
-    return name, enhanced_description, category
+    categories = df['category'].fillna('Unknown').astype(str).str.lower()
+    fallback = "A " + categories + " species identified using database knowledge."
+    enhanced_description = enhanced_description.where(enhanced_description != '', fallback)
+    
+    confidence_text = pd.Series(confidences, index=df.index).map("{:.1%}".format)
+    return enhanced_description + " (Detected with " + confidence_text + " confidence using enhanced AI analysis)"
+
+def _parse_json_response(response):
+    """Parse a JSON response body, using orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(response.content)
+    return response.json()
+
+# How long iNaturalist and Wikipedia lookups are reused across reruns (seconds)
+LOCATION_LOOKUP_CACHE_TTL = 86400
+
+@st.cache_data(ttl=LOCATION_LOOKUP_CACHE_TTL, show_spinner=False)
+def _fetch_inaturalist_observations(params):
+    """
+    Fetch iNaturalist observations, cached per query across reruns
+    
+    Request errors raise instead of returning, so failures are never cached.
+    """
+    url = "https://api.inaturalist.org/v1/observations"
+    response = _http.get(url, params=params, timeout=20)
+    response.raise_for_status()
+    
+    data = _parse_json_response(response)
+    return data.get("results", [])
+
+# Bodies and validators (ETag / Last-Modified) of fetched Wikipedia summaries,
+# kept on disk when diskcache is available so revalidation survives restarts
+_wikipedia_summaries = _lookup_cache if _lookup_cache is not None else {}
+
+@st.cache_data(ttl=LOCATION_LOOKUP_CACHE_TTL, show_spinner=False)
+def _fetch_wikipedia_summary(page_title):
+    """
+    Fetch a Wikipedia page summary, cached per title across reruns
+    
+    Summaries fetched before are revalidated with If-None-Match /
+    If-Modified-Since, so an unchanged page costs a 304 with no body.
+    Returns None for pages that don't exist; other request errors raise so
+    they are never cached.
+    """
+    url = "https://en.wikipedia.org/api/rest_v1/page/summary/" + page_title
+    cache_key = ("wikipedia_summary", page_title)
+    cached = _wikipedia_summaries.get(cache_key)
+    
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+    
+    response = _http.get(url, headers=headers, timeout=10)
+    if response.status_code == 304 and cached:
+        return cached["data"]
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    
+    data = _parse_json_response(response)
+    _wikipedia_summaries[cache_key] = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "data": data
+    }
+    return data
 
 def search_inaturalist_for_location(animal_name, category=None):
     """
@@ -683,12 +980,7 @@ def search_inaturalist_for_location(animal_name, category=None):
                 params["q"] = query
                 
                 logger.info(f"Searching iNaturalist for: {query}")
-                url = "https://api.inaturalist.org/v1/observations"
-                response = requests.get(url, params=params, timeout=20)
-                response.raise_for_status()
-                
-                data = response.json()
-                observations = data.get("results", [])
+                observations = _fetch_inaturalist_observations(params)
                 
                 # Look for observations with location data
                 for observation in observations:
@@ -729,6 +1021,13 @@ def search_inaturalist_for_location(animal_name, category=None):
         logger.error(f"Error searching iNaturalist for {animal_name}: {e}")
         return None
 
+# Phrases in a Wikipedia extract that introduce where a species lives; the
+# captured place stops at the first period, comma or semicolon
+GEOGRAPHIC_MENTION_RE = re.compile(
+    r'(?:found in|native to|distributed in|occurs in|inhabits)\s+([^.,;]+)',
+    re.IGNORECASE
+)
+
 def get_location_from_wikipedia(animal_name):
     """
     Try to extract location information from Wikipedia
@@ -741,45 +1040,26 @@ def get_location_from_wikipedia(animal_name):
     """
     try:
         # Search for Wikipedia page
-        search_url = "https://en.wikipedia.org/api/rest_v1/page/summary/" + animal_name.replace(" ", "_")
-        
-        headers = {
-            'User-Agent': 'NatureTrace/1.0 (flora.jiang1990@gmail.com)'
-        }
-        
-        response = requests.get(search_url, headers=headers, timeout=10)
+        data = _fetch_wikipedia_summary(animal_name.replace(" ", "_"))
         
-        if response.status_code == 200:
-            data = response.json()
+        if data:
             extract = data.get('extract', '')
             
-            # Look for geographic mentions in the text
-            geographic_patterns = [
-                r'found in ([^.]+)',
-                r'native to ([^.]+)',
-                r'distributed in ([^.]+)',
-                r'occurs in ([^.]+)',
-                r'inhabits ([^.]+)'
-            ]
-            
-            for pattern in geographic_patterns:
-                match = re.search(pattern, extract, re.IGNORECASE)
-                if match:
-                    location_text = match.group(1)
-                    # Clean up the location text
-                    location_text = re.sub(r'[,;].*', '', location_text).strip()
-                    
-                    # Try to get coordinates for this location using a geocoding service
-                    coords = geocode_location(location_text)
-                    if coords:
-                        logger.info(f"Found Wikipedia location for {animal_name}: {location_text}")
-                        return {
-                            "latitude": coords['lat'],
-                            "longitude": coords['lng'],
-                            "location_string": location_text,
-                            "place_guess": f"{location_text} (Wikipedia)",
-                            "source": "Wikipedia"
-                        }
+            # Look for geographic mentions in the text, in a single scan
+            for match in GEOGRAPHIC_MENTION_RE.finditer(extract):
+                location_text = match.group(1).strip()
+                
+                # Try to get coordinates for this location using a geocoding service
+                coords = geocode_location(location_text)
+                if coords:
+                    logger.info(f"Found Wikipedia location for {animal_name}: {location_text}")
+                    return {
+                        "latitude": coords['lat'],
+                        "longitude": coords['lng'],
+                        "location_string": location_text,
+                        "place_guess": f"{location_text} (Wikipedia)",
+                        "source": "Wikipedia"
+                    }
             
         logger.warning(f"No location data found for {animal_name} in Wikipedia")
         return None
@@ -788,6 +1068,227 @@ def get_location_from_wikipedia(animal_name):
         logger.error(f"Error searching Wikipedia for {animal_name}: {e}")
         return None
 
+# Approximate centroids for continents and broad regions that commonly appear
+# in species range descriptions, keyed by lower-case name
+CONTINENT_CENTROIDS = {
+    'africa': (1.65, 17.68),
+    'sub-saharan africa': (-1.29, 22.0),
+    'north africa': (26.0, 13.0),
+    'east africa': (1.96, 37.3),
+    'west africa': (11.0, -4.0),
+    'central africa': (2.0, 20.0),
+    'southern africa': (-25.0, 25.0),
+    'asia': (34.05, 100.62),
+    'southeast asia': (6.0, 110.0),
+    'south asia': (22.0, 79.0),
+    'east asia': (35.0, 115.0),
+    'central asia': (45.0, 68.0),
+    'the middle east': (29.0, 45.0),
+    'middle east': (29.0, 45.0),
+    'europe': (54.53, 15.26),
+    'western europe': (48.0, 4.0),
+    'eastern europe': (52.0, 28.0),
+    'northern europe': (62.0, 15.0),
+    'southern europe': (41.0, 14.0),
+    'north america': (54.53, -105.26),
+    'central america': (12.77, -85.6),
+    'south america': (-8.78, -55.49),
+    'latin america': (-4.44, -61.33),
+    'the caribbean': (18.0, -72.0),
+    'caribbean': (18.0, -72.0),
+    'oceania': (-22.74, 140.02),
+    'australasia': (-25.0, 140.0),
+    'antarctica': (-82.86, 135.0),
+    'the arctic': (76.25, -100.0),
+    'arctic': (76.25, -100.0),
+    'eurasia': (50.0, 60.0),
+    'the americas': (15.0, -85.0),
+    'americas': (15.0, -85.0),
+    'the amazon': (-3.47, -62.22),
+    'amazon rainforest': (-3.47, -62.22),
+    'the sahara': (23.42, 13.0),
+    'siberia': (61.01, 99.2),
+    'borneo': (0.96, 114.55),
+    'sumatra': (-0.59, 101.34),
+    'new guinea': (-5.5, 141.0),
+    'the himalayas': (28.6, 83.93),
+    'himalayas': (28.6, 83.93),
+    'scandinavia': (63.0, 15.0),
+    'the mediterranean': (38.0, 15.0),
+    'mediterranean': (38.0, 15.0),
+}
+
+COUNTRY_CENTROIDS = {
+    'afghanistan': (33.94, 67.71),
+    'albania': (41.15, 20.17),
+    'algeria': (28.03, 1.66),
+    'angola': (-11.2, 17.87),
+    'argentina': (-38.42, -63.62),
+    'armenia': (40.07, 45.04),
+    'australia': (-25.27, 133.78),
+    'austria': (47.52, 14.55),
+    'azerbaijan': (40.14, 47.58),
+    'bangladesh': (23.68, 90.36),
+    'belarus': (53.71, 27.95),
+    'belgium': (50.5, 4.47),
+    'belize': (17.19, -88.5),
+    'benin': (9.31, 2.32),
+    'bhutan': (27.51, 90.43),
+    'bolivia': (-16.29, -63.59),
+    'botswana': (-22.33, 24.68),
+    'brazil': (-14.24, -51.93),
+    'bulgaria': (42.73, 25.49),
+    'burkina faso': (12.24, -1.56),
+    'burundi': (-3.37, 29.92),
+    'cambodia': (12.57, 104.99),
+    'cameroon': (7.37, 12.35),
+    'canada': (56.13, -106.35),
+    'central african republic': (6.61, 20.94),
+    'chad': (15.45, 18.73),
+    'chile': (-35.68, -71.54),
+    'china': (35.86, 104.2),
+    'colombia': (4.57, -74.3),
+    'costa rica': (9.75, -83.75),
+    'croatia': (45.1, 15.2),
+    'cuba': (21.52, -77.78),
+    'czech republic': (49.82, 15.47),
+    'democratic republic of the congo': (-4.04, 21.76),
+    'denmark': (56.26, 9.5),
+    'dominican republic': (18.74, -70.16),
+    'ecuador': (-1.83, -78.18),
+    'egypt': (26.82, 30.8),
+    'el salvador': (13.79, -88.9),
+    'eritrea': (15.18, 39.78),
+    'estonia': (58.6, 25.01),
+    'ethiopia': (9.15, 40.49),
+    'fiji': (-16.58, 179.41),
+    'finland': (61.92, 25.75),
+    'france': (46.23, 2.21),
+    'french guiana': (3.93, -53.13),
+    'gabon': (-0.8, 11.61),
+    'georgia': (42.32, 43.36),
+    'germany': (51.17, 10.45),
+    'ghana': (7.95, -1.02),
+    'greece': (39.07, 21.82),
+    'greenland': (71.71, -42.6),
+    'guatemala': (15.78, -90.23),
+    'guinea': (9.95, -9.7),
+    'guyana': (4.86, -58.93),
+    'haiti': (18.97, -72.29),
+    'honduras': (15.2, -86.24),
+    'hungary': (47.16, 19.5),
+    'iceland': (64.96, -19.02),
+    'india': (20.59, 78.96),
+    'indonesia': (-0.79, 113.92),
+    'iran': (32.43, 53.69),
+    'iraq': (33.22, 43.68),
+    'ireland': (53.41, -8.24),
+    'israel': (31.05, 34.85),
+    'italy': (41.87, 12.57),
+    'ivory coast': (7.54, -5.55),
+    'jamaica': (18.11, -77.3),
+    'japan': (36.2, 138.25),
+    'jordan': (30.59, 36.24),
+    'kazakhstan': (48.02, 66.92),
+    'kenya': (-0.02, 37.91),
+    'kyrgyzstan': (41.2, 74.77),
+    'laos': (19.86, 102.5),
+    'latvia': (56.88, 24.6),
+    'lebanon': (33.85, 35.86),
+    'liberia': (6.43, -9.43),
+    'libya': (26.34, 17.23),
+    'lithuania': (55.17, 23.88),
+    'madagascar': (-18.77, 46.87),
+    'malawi': (-13.25, 34.3),
+    'malaysia': (4.21, 101.98),
+    'mali': (17.57, -4.0),
+    'mauritania': (21.01, -10.94),
+    'mexico': (23.63, -102.55),
+    'moldova': (47.41, 28.37),
+    'mongolia': (46.86, 103.85),
+    'morocco': (31.79, -7.09),
+    'mozambique': (-18.67, 35.53),
+    'myanmar': (21.91, 95.96),
+    'namibia': (-22.96, 18.49),
+    'nepal': (28.39, 84.12),
+    'netherlands': (52.13, 5.29),
+    'new zealand': (-40.9, 174.89),
+    'nicaragua': (12.87, -85.21),
+    'niger': (17.61, 8.08),
+    'nigeria': (9.08, 8.68),
+    'north korea': (40.34, 127.51),
+    'norway': (60.47, 8.47),
+    'oman': (21.51, 55.92),
+    'pakistan': (30.38, 69.35),
+    'panama': (8.54, -80.78),
+    'papua new guinea': (-6.31, 143.96),
+    'paraguay': (-23.44, -58.44),
+    'peru': (-9.19, -75.02),
+    'philippines': (12.88, 121.77),
+    'poland': (51.92, 19.15),
+    'portugal': (39.4, -8.22),
+    'republic of the congo': (-0.23, 15.83),
+    'romania': (45.94, 24.97),
+    'russia': (61.52, 105.32),
+    'rwanda': (-1.94, 29.87),
+    'saudi arabia': (23.89, 45.08),
+    'senegal': (14.5, -14.45),
+    'serbia': (44.02, 21.01),
+    'sierra leone': (8.46, -11.78),
+    'singapore': (1.35, 103.82),
+    'slovakia': (48.67, 19.7),
+    'slovenia': (46.15, 14.99),
+    'somalia': (5.15, 46.2),
+    'south africa': (-30.56, 22.94),
+    'south korea': (35.91, 127.77),
+    'south sudan': (6.88, 31.31),
+    'spain': (40.46, -3.75),
+    'sri lanka': (7.87, 80.77),
+    'sudan': (12.86, 30.22),
+    'suriname': (3.92, -56.03),
+    'sweden': (60.13, 18.64),
+    'switzerland': (46.82, 8.23),
+    'syria': (34.8, 38.99),
+    'taiwan': (23.7, 120.96),
+    'tajikistan': (38.86, 71.28),
+    'tanzania': (-6.37, 34.89),
+    'thailand': (15.87, 100.99),
+    'togo': (8.62, 0.82),
+    'tunisia': (33.89, 9.54),
+    'turkey': (38.96, 35.24),
+    'turkmenistan': (38.97, 59.56),
+    'uganda': (1.37, 32.29),
+    'ukraine': (48.38, 31.17),
+    'united arab emirates': (23.42, 53.85),
+    'united kingdom': (55.38, -3.44),
+    'great britain': (54.0, -2.0),
+    'britain': (54.0, -2.0),
+    'united states': (37.09, -95.71),
+    'the united states': (37.09, -95.71),
+    'usa': (37.09, -95.71),
+    'uruguay': (-32.52, -55.77),
+    'uzbekistan': (41.38, 64.59),
+    'venezuela': (6.42, -66.59),
+    'vietnam': (14.06, 108.28),
+    'yemen': (15.55, 48.52),
+    'zambia': (-13.13, 27.85),
+    'zimbabwe': (-19.02, 29.15),
+}
+
+# Nominatim's usage policy allows at most one request per second
+NOMINATIM_MIN_INTERVAL = 1.0
+
+# Coordinates already resolved in this process, keyed by normalized location text
+_geocode_cache = {}
+
+# Serialises Nominatim requests across threads to honour the rate limit
+_nominatim_lock = threading.Lock()
+_last_nominatim_request = 0.0
+
+def _normalize_location_text(location_text):
+    """Normalize location text for geocode cache lookups"""
+    return location_text.lower().strip()
+
 def geocode_location(location_text):
     """
     Convert location text to coordinates using a free geocoding service
@@ -798,6 +1299,24 @@ def geocode_location(location_text):
     Returns:
         dict: Coordinates or None if not found
     """
+    cache_key = _normalize_location_text(location_text)
+    if cache_key in _geocode_cache:
+        return _geocode_cache[cache_key]
+    
+    # Well-known countries and regions resolve locally without a Nominatim request
+    centroid = COUNTRY_CENTROIDS.get(cache_key) or CONTINENT_CENTROIDS.get(cache_key)
+    if centroid:
+        return {'lat': centroid[0], 'lng': centroid[1]}
+    
+    coords = _geocode_with_nominatim(location_text)
+    if coords:
+        _geocode_cache[cache_key] = coords
+    return coords
+
+@_disk_memoize
+def _geocode_with_nominatim(location_text):
+    """Look up coordinates for location text with Nominatim, at most one request per second"""
+    global _last_nominatim_request
     try:
         # Use Nominatim (OpenStreetMap) free geocoding service
         url = "https://nominatim.openstreetmap.org/search"
@@ -807,11 +1326,13 @@ def geocode_location(location_text):
             'limit': 1
         }
         
-        headers = {
-            'User-Agent': 'NatureTrace/1.0 (flora.jiang1990@gmail.com)'
-        }
+        with _nominatim_lock:
+            wait = NOMINATIM_MIN_INTERVAL - (time.monotonic() - _last_nominatim_request)
+            if wait > 0:
+                time.sleep(wait)
+            _last_nominatim_request = time.monotonic()
         
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = _http.get(url, params=params, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -828,6 +1349,33 @@ def geocode_location(location_text):
         logger.error(f"Error geocoding {location_text}: {e}")
         return None
 
+def geocode_locations(location_texts):
+    """
+    Geocode many location strings, making one Nominatim request per distinct location
+    
+    Location strings are deduplicated after normalization (many species share
+    regions such as "Sub-Saharan Africa"); uncached requests are spaced by
+    _geocode_with_nominatim to respect the Nominatim rate limit.
+    
+    Args:
+        location_texts: List of location descriptions
+    
+    Returns:
+        dict: Mapping of each location string to its coordinates (or None if not found)
+    """
+    coords_by_key = {}
+    
+    for location_text in location_texts:
+        cache_key = _normalize_location_text(location_text)
+        if cache_key not in coords_by_key:
+            coords_by_key[cache_key] = geocode_location(location_text)
+    
+    return {
+        location_text: coords_by_key[_normalize_location_text(location_text)]
+        for location_text in location_texts
+    }
+
+@_disk_memoize
 def get_location_from_groq(animal_name, category=None):
     """
     Use Groq AI to get typical habitat/location information for an animal
@@ -884,47 +1432,141 @@ Examples:
         # Parse the JSON response
         try:
             location_data = json.loads(response_text)
-            
-            if "error" in location_data:
-                logger.warning(f"Groq couldn't determine location for {animal_name}")
-                return None
-            
-            # Extract coordinates
-            coords = location_data.get("coordinates", {})
-            if coords and "lat" in coords and "lng" in coords:
-                region = location_data.get("region", "")
-                country = location_data.get("country", "")
-                
-                place_description = f"{region}"
-                if country:
-                    place_description += f", {country}"
-                place_description += " (AI habitat)"
-                
-                logger.info(f"Found Groq location for {animal_name}")
-                
-                return {
-                    "latitude": coords["lat"],
-                    "longitude": coords["lng"],
-                    "location_string": region,
-                    "place_guess": place_description,
-                    "source": "Groq AI"
-                }
-            
         except json.JSONDecodeError:
             logger.error(f"Invalid JSON response from Groq for {animal_name}")
             return None
         
-        logger.warning(f"No valid coordinates from Groq for {animal_name}")
-        return None
+        return _groq_location_to_record(animal_name, location_data)
         
     except Exception as e:
         logger.error(f"Error using Groq for {animal_name}: {e}")
         return None
 
+def _groq_location_to_record(animal_name, location_data):
+    """Convert a parsed Groq location object into location data, or None if it has no coordinates"""
+    if "error" in location_data:
+        logger.warning(f"Groq couldn't determine location for {animal_name}")
+        return None
+    
+    # Extract coordinates
+    coords = location_data.get("coordinates", {})
+    if coords and "lat" in coords and "lng" in coords:
+        region = location_data.get("region", "")
+        country = location_data.get("country", "")
+        
+        place_description = f"{region}"
+        if country:
+            place_description += f", {country}"
+        place_description += " (AI habitat)"
+        
+        logger.info(f"Found Groq location for {animal_name}")
+        
+        return {
+            "latitude": coords["lat"],
+            "longitude": coords["lng"],
+            "location_string": region,
+            "place_guess": place_description,
+            "source": "Groq AI"
+        }
+    
+    logger.warning(f"No valid coordinates from Groq for {animal_name}")
+    return None
+
+# Animals per batched Groq location prompt, keeping the JSON reply well within max_tokens
+GROQ_LOCATION_BATCH_SIZE = 20
+
+def get_locations_from_groq(animals):
+    """
+    Use Groq AI to get typical habitat/location information for many animals at once
+    
+    Animals are sent in batches of GROQ_LOCATION_BATCH_SIZE per chat
+    completion. If a batch reply can't be parsed, its animals fall back to
+    get_location_from_groq one at a time.
+    
+    Args:
+        animals: List of (animal_name, category) tuples; category may be None
+    
+    Returns:
+        dict: Mapping of animal name to location data (None where not found)
+    """
+    locations = {}
+    if not animals:
+        return locations
+    
+    groq_key = st.secrets.get("groq_api_key")
+    if not groq_key:
+        logger.warning("Groq API key not found in secrets")
+        return {animal_name: None for animal_name, _ in animals}
+    
+    client = Groq(api_key=groq_key)
+    
+    for start in range(0, len(animals), GROQ_LOCATION_BATCH_SIZE):
+        batch = animals[start:start + GROQ_LOCATION_BATCH_SIZE]
+        animal_lines = "\n".join(
+            f"{index}. {animal_name}" + (f" (a {category})" if category else "")
+            for index, (animal_name, category) in enumerate(batch, 1)
+        )
+        prompt = f"""
+For each animal in the numbered list below, provide the primary geographic region where this species is typically found.
+
+{animal_lines}
+
+Respond with ONLY a JSON array with one object per animal, in the same order, in this exact format:
+[
+    {{"name": "animal name as given", "region": "specific geographic region name", "country": "primary country if applicable", "coordinates": {{"lat": latitude_number, "lng": longitude_number}}}}
+]
+
+If you cannot determine a specific location for an animal, use: {{"name": "animal name as given", "error": "unknown"}}
+
+Example entry:
+- For "African Elephant": {{"name": "African Elephant", "region": "Sub-Saharan Africa", "country": "Kenya", "coordinates": {{"lat": -1.2921, "lng": 36.8219}}}}
+"""
+        
+        try:
+            chat_completion = client.chat.completions.create(
+                messages=[{
+                    "role": "user",
+                    "content": prompt
+                }],
+                model="llama3-8b-8192",
+                temperature=0.1,
+                max_tokens=150 * len(batch)
+            )
+            entries = json.loads(chat_completion.choices[0].message.content.strip())
+            if not isinstance(entries, list):
+                raise ValueError("expected a JSON array")
+        except Exception as e:
+            logger.error(f"Batched Groq location lookup failed ({e}); falling back to single lookups")
+            for animal_name, category in batch:
+                locations[animal_name] = get_location_from_groq(animal_name, category)
+            continue
+        
+        entries_by_name = {
+            str(entry.get("name", "")).lower(): entry for entry in entries if isinstance(entry, dict)
+        }
+        # Positions only line up when the reply has exactly one entry per animal
+        positional = len(entries) == len(batch)
+        for index, (animal_name, category) in enumerate(batch):
+            # Prefer matching by name, fall back to position in the reply
+            entry = entries_by_name.get(animal_name.lower())
+            if entry is None and positional and isinstance(entries[index], dict):
+                entry = entries[index]
+            if entry is None:
+                # Dropped or renamed in the reply; ask for this animal on its own
+                locations[animal_name] = get_location_from_groq(animal_name, category)
+            else:
+                locations[animal_name] = _groq_location_to_record(animal_name, entry)
+    
+    return locations
+
 def fetch_location_for_animal(animal_name, category=None):
     """
     Fetch location data using multiple sources with fallbacks
     
+    iNaturalist, Wikipedia and Groq AI are queried in parallel, and results
+    are taken in that priority order: a source's answer is returned as soon
+    as every higher-priority source has come back empty.
+    
     Args:
         animal_name: Name of the animal to search for
         category: Optional category filter
@@ -932,29 +1574,69 @@ def fetch_location_for_animal(animal_name, category=None):
     Returns:
         dict: Location data or None if not found from any source
     """
-    # First try iNaturalist (most reliable for actual sightings)
-    logger.info(f"� [1/3] Searching iNaturalist for {animal_name}...")
-    inaturalist_result = search_inaturalist_for_location(animal_name, category)
-    if inaturalist_result:
-        return inaturalist_result
-    
-    # If iNaturalist fails, try Wikipedia (good for general habitat info)
-    logger.info(f"� [2/3] Searching Wikipedia for {animal_name}...")
-    wikipedia_result = get_location_from_wikipedia(animal_name)
-    if wikipedia_result:
-        return wikipedia_result
-    
-    # If Wikipedia fails, try Groq AI (AI-generated typical habitat)
-    logger.info(f"� [3/3] Using Groq AI for {animal_name}...")
-    groq_result = get_location_from_groq(animal_name, category)
-    if groq_result:
-        return groq_result
+    logger.info(f"Searching iNaturalist, Wikipedia and Groq AI for {animal_name}...")
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=3)
+    futures = [
+        # iNaturalist first (most reliable for actual sightings)
+        executor.submit(search_inaturalist_for_location, animal_name, category),
+        # Then Wikipedia (good for general habitat info)
+        executor.submit(get_location_from_wikipedia, animal_name),
+        # Then Groq AI (AI-generated typical habitat)
+        executor.submit(get_location_from_groq, animal_name, category),
+    ]
+    
+    try:
+        for future in futures:
+            result = future.result()
+            if result:
+                return result
+    finally:
+        # Don't wait on lower-priority sources once an answer is in hand
+        executor.shutdown(wait=False, cancel_futures=True)
     
     logger.warning(f"No location data found for {animal_name} from any source")
     return None
 
+# Animals resolved concurrently by fetch_locations_for_animals
+LOCATION_BATCH_WORKERS = 8
+
+def fetch_locations_for_animals(animals):
+    """
+    Fetch location data for many animals at once
+    
+    iNaturalist and Wikipedia lookups for all animals run concurrently on a
+    thread pool sharing the pooled HTTP session; animals neither source
+    resolves are then sent to Groq AI in batched prompts.
+    
+    Args:
+        animals: List of (animal_name, category) tuples; category may be None
+    
+    Returns:
+        dict: Mapping of animal name to location data (None where not found)
+    """
+    def resolve(animal):
+        animal_name, category = animal
+        return search_inaturalist_for_location(animal_name, category) or get_location_from_wikipedia(animal_name)
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=LOCATION_BATCH_WORKERS) as executor:
+        locations = dict(zip((animal_name for animal_name, _ in animals), executor.map(resolve, animals)))
+    
+    unresolved = [(animal_name, category) for animal_name, category in animals if not locations[animal_name]]
+    if unresolved:
+        logger.info(f"Using Groq AI for {len(unresolved)} animals without iNaturalist or Wikipedia locations...")
+        locations.update(get_locations_from_groq(unresolved))
+    
+    return locations
+
+# Set once the sound columns have been verified, so later calls skip the DESCRIBE
+_sound_columns_verified = False
+
 def ensure_sound_columns_exist():
     """Ensure that sound_source and sound_updated columns exist in the database"""
+    global _sound_columns_verified
+    if _sound_columns_verified:
+        return True
+    
     conn = get_snowflake_connection()
     if not conn:
         return False
@@ -977,13 +1659,34 @@ def ensure_sound_columns_exist():
         
         cursor.close()
         logger.info("Sound columns verified/added successfully")
+        _sound_columns_verified = True
         return True
         
     except Exception as e:
         logger.error(f"Error ensuring sound columns: {e}")
         return False
-    finally:
-        conn.close()
+
+def _fetch_enhanced_sound(animal_name, animal_type="unknown"):
+    """
+    Fetch a sound for an animal with human speech removed where detected
+    
+    Returns:
+        tuple: (sound_url, source, processed) or (None, None, False) if no sound was found
+    """
+    from utils.sound_utils import fetch_clean_animal_sound
+    logger.info(f"Fetching enhanced sound for {animal_name} (type: {animal_type})")
+    
+    # Use the enhanced sound fetcher with speech removal
+    result = fetch_clean_animal_sound(animal_name, animal_type)
+    
+    if not result.get('success'):
+        return None, None, False
+    
+    sound_url = result.get('processed_url') or result.get('original_url')
+    source = result.get('source', 'Unknown')
+    if result.get('speech_removed'):
+        return sound_url, source + " (processed)", True
+    return sound_url, source, False
 
 def update_animal_sound_enhanced(animal_id=None, animal_name=None, sound_url=None, source=None, processed=False):
     """
@@ -1008,8 +1711,9 @@ def update_animal_sound_enhanced(animal_id=None, animal_name=None, sound_url=Non
         ensure_sound_columns_exist()
         
         cursor = conn.cursor()
+        animal_type = "unknown"
         
-        # Get animal information if not provided
+        # Resolve the animal up front so the update below is always by primary key
         if animal_id and not animal_name:
             cursor.execute("SELECT name, category FROM animal_insight_data WHERE id = %s", (animal_id,))
             result = cursor.fetchone()
@@ -1018,32 +1722,26 @@ def update_animal_sound_enhanced(animal_id=None, animal_name=None, sound_url=Non
             else:
                 return {"success": False, "sound_url": None, "source": None, "message": f"Animal with ID {animal_id} not found"}
         elif animal_name and not animal_id:
-            cursor.execute("SELECT id, category FROM animal_insight_data WHERE UPPER(name) = UPPER(%s) LIMIT 1", (animal_name,))
+            cursor.execute("SELECT id, category FROM animal_insight_data WHERE UPPER(name) = %s LIMIT 1", (animal_name.upper(),))
             result = cursor.fetchone()
             if result:
                 animal_id, animal_type = result
-            else:
-                animal_type = "unknown"
+        
+        if not animal_id:
+            return {
+                "success": False, 
+                "sound_url": None, 
+                "source": None, 
+                "message": f"No records updated - animal {animal_name} may not exist"
+            }
         
         # If no sound URL provided, fetch one using enhanced logic
         if not sound_url:
             try:
-                from utils.sound_utils import fetch_clean_animal_sound
-                logger.info(f"Fetching enhanced sound for {animal_name} (type: {animal_type if 'animal_type' in locals() else 'unknown'})")
-                
-                # Use the enhanced sound fetcher with speech removal
-                result = fetch_clean_animal_sound(
-                    animal_name, 
-                    animal_type if 'animal_type' in locals() else "unknown"
-                )
+                sound_url, source, speech_removed = _fetch_enhanced_sound(animal_name, animal_type or "unknown")
+                processed = processed or speech_removed
                 
-                if result.get('success'):
-                    sound_url = result.get('processed_url') or result.get('original_url')
-                    source = result.get('source', 'Unknown')
-                    if result.get('speech_removed'):
-                        source += " (processed)"
-                        processed = True
-                else:
+                if not sound_url:
                     return {"success": False, "sound_url": None, "source": None, "message": f"No sound found for {animal_name}"}
                     
             except Exception as e:
@@ -1055,18 +1753,11 @@ def update_animal_sound_enhanced(animal_id=None, animal_name=None, sound_url=Non
             enhanced_source += " (processed)"
         
         # Update the database with enhanced sound data
-        if animal_id:
-            cursor.execute("""
-                UPDATE animal_insight_data 
-                SET sound_url = %s, sound_source = %s, sound_updated = CURRENT_TIMESTAMP()
-                WHERE id = %s
-            """, (sound_url, enhanced_source, animal_id))
-        else:
-            cursor.execute("""
-                UPDATE animal_insight_data 
-                SET sound_url = %s, sound_source = %s, sound_updated = CURRENT_TIMESTAMP()
-                WHERE UPPER(name) = UPPER(%s)
-            """, (sound_url, enhanced_source, animal_name))
+        cursor.execute("""
+            UPDATE animal_insight_data 
+            SET sound_url = %s, sound_source = %s, sound_updated = CURRENT_TIMESTAMP()
+            WHERE id = %s
+        """, (sound_url, enhanced_source, animal_id))
         
         affected_rows = cursor.rowcount
         cursor.close()
@@ -1089,5 +1780,48 @@ def update_animal_sound_enhanced(animal_id=None, animal_name=None, sound_url=Non
             
     except Exception as e:
         return {"success": False, "sound_url": None, "source": None, "message": f"Database error: {str(e)}"}
-    finally:
-        conn.close()
+
+def update_animal_sounds_enhanced(updates):
+    """
+    Batch version of update_animal_sound_enhanced for sounds that are already fetched
+    
+    All rows are written with one MERGE (per SOUND_MERGE_BATCH_SIZE rows)
+    instead of one UPDATE round trip per animal.
+    
+    Args:
+        updates: List of dicts with "animal_id", "sound_url", "source" and
+                 optionally "processed" (whether speech was removed)
+    
+    Returns:
+        dict: {"success": bool, "updated": int, "message": str}
+    """
+    rows = []
+    for update in updates:
+        source = update.get("source") or "Unknown"
+        if update.get("processed") and " (processed)" not in source:
+            source += " (processed)"
+        rows.append((update["animal_id"], update["sound_url"], source))
+    
+    if not rows:
+        return {"success": True, "updated": 0, "message": "No sound updates to apply"}
+    
+    conn = get_snowflake_connection()
+    if not conn:
+        return {"success": False, "updated": 0, "message": "Database connection failed"}
+    
+    try:
+        # Ensure sound columns exist
+        ensure_sound_columns_exist()
+        
+        cursor = conn.cursor()
+        updated = _merge_sound_urls(cursor, rows)
+        cursor.close()
+        
+        return {
+            "success": updated > 0,
+            "updated": updated,
+            "message": f"Enhanced sound data updated for {updated} of {len(rows)} animals"
+        }
+        
+    except Exception as e:
+        return {"success": False, "updated": 0, "message": f"Database error: {str(e)}"}
@@ -3,13 +3,123 @@
 import streamlit as st
 import pandas as pd
 import logging
+import io
+import re
+import concurrent.futures
+from PIL import Image
+from dataclasses import dataclass, asdict
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
-from utils.image_utils import process_images, is_duplicate_image
+from utils.image_utils import (
+    process_images, is_duplicate_image, content_digest, compute_perceptual_hash,
+    find_near_duplicate, DECODE_MAX_SIDE
+)
 from utils.azure_vision import get_azure_image_analysis, compare_recognition_results
-from utils.groq_comparison import get_groq_animal_comparison, get_animal_classification_confidence
+from utils.groq_comparison import (
+    get_groq_animal_comparison, get_animal_classification_confidence, create_fallback_comparison
+)
 
 logger = logging.getLogger(__name__)
 
+# Uploads recognised concurrently by enhanced_image_recognition_batch; each
+# one holds its own AI/Azure workers, so this bounds in-flight API calls
+RECOGNITION_BATCH_WORKERS = 8
+
+def _duplicate_result(uploaded_file, message: str) -> Dict:
+    """Recognition result for an upload rejected as a duplicate"""
+    return {
+        'success': False,
+        'is_duplicate': True,
+        'message': message,
+        'filename': uploaded_file.name
+    }
+
+def _recognition_error_result(uploaded_file, error: Exception) -> Dict:
+    """Recognition result for an upload whose pipeline raised"""
+    logger.error(f"Enhanced image recognition failed for {uploaded_file.name}: {error}")
+    return {
+        'success': False,
+        'is_duplicate': False,
+        'error': str(error),
+        'message': f"Recognition failed for {uploaded_file.name}",
+        'filename': uploaded_file.name
+    }
+
+def _decode_upload(img_bytes: bytes) -> Image.Image:
+    """Decode upload bytes to RGB; large JPEGs are decoded straight at a reduced DCT scale"""
+    image = Image.open(io.BytesIO(img_bytes))
+    image.draft('RGB', (DECODE_MAX_SIDE, DECODE_MAX_SIDE))
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return image
+
+def _near_duplicate_result(uploaded_file, perceptual_hash) -> Optional[Dict]:
+    """
+    Duplicate result if the upload is a resized or recompressed copy of an
+    already saved image, otherwise None
+    """
+    near_duplicate = find_near_duplicate(perceptual_hash, uploaded_file.name)
+    if near_duplicate:
+        return _duplicate_result(
+            uploaded_file, f"Image {uploaded_file.name} is a near-duplicate of {near_duplicate}"
+        )
+    return None
+
+def _recognize_upload(uploaded_file, img_bytes: bytes, image: Image.Image, perceptual_hash) -> Dict:
+    """
+    Steps 2-4 of the pipeline: AI model, Azure, Groq comparison and final
+    recommendation for an upload that passed the duplicate checks
+    
+    Raises:
+        Exception: If any step fails
+    """
+    # Step 2: Current AI model and Azure Computer Vision run concurrently;
+    # Azure uploads the original encoded bytes rather than the decoded image
+    logger.info("Running current AI model and Azure Computer Vision analysis...")
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        ai_future = executor.submit(process_images, image)
+        azure_future = executor.submit(get_azure_image_analysis, img_bytes)
+        ai_animal_name, ai_animal_type, ai_description = ai_future.result()
+        azure_result = azure_future.result()
+    
+    ai_result = {
+        'name': ai_animal_name,
+        'type': ai_animal_type,
+        'description': ai_description,
+        'source': 'current_ai_model'
+    }
+    
+    # Step 3: Groq comparison and conflict resolution
+    azure_animals = azure_result.get('animals', [])
+    
+    if not azure_animals or ai_animal_name.lower() == azure_animals[0]['name'].lower():
+        # Nothing to reconcile: Azure found no animals or agrees exactly
+        groq_comparison = create_fallback_comparison(ai_animal_name, azure_animals)
+    else:
+        logger.info("Using Groq to compare and analyze results...")
+        image_context = f"Image filename: {uploaded_file.name}, AI description: {ai_description}"
+        
+        groq_comparison = get_groq_animal_comparison(
+            ai_prediction=ai_animal_name,
+            azure_predictions=azure_animals,
+            image_context=image_context
+        )
+    
+    # Step 4: Determine final recommendation
+    final_result = process_recognition_results(
+        ai_result=ai_result,
+        azure_result=azure_result,
+        groq_comparison=groq_comparison,
+        uploaded_file=uploaded_file
+    )
+    
+    # Recorded by the caller once the image is actually saved
+    final_result['perceptual_hash'] = perceptual_hash
+    
+    logger.info(f"Enhanced recognition completed for {uploaded_file.name}: {final_result.get('recommendation')}")
+    
+    return final_result
+
 def enhanced_image_recognition(uploaded_file) -> Dict:
     """
     Enhanced image recognition pipeline that combines current AI model with Azure Computer Vision
@@ -25,68 +135,152 @@ def enhanced_image_recognition(uploaded_file) -> Dict:
         # Step 1: Check for duplicates
         logger.info(f"Processing image: {uploaded_file.name}")
         
-        is_duplicate = is_duplicate_image(uploaded_file)
-        if is_duplicate:
-            return {
-                'success': False,
-                'is_duplicate': True,
-                'message': f"Image {uploaded_file.name} already exists in database",
-                'filename': uploaded_file.name
-            }
-        
-        # Step 2: Current AI model recognition
-        logger.info("Running current AI model analysis...")
-        ai_animal_name, ai_animal_type, ai_description = process_images(uploaded_file)
-        
-        ai_result = {
-            'name': ai_animal_name,
-            'type': ai_animal_type,
-            'description': ai_description,
-            'source': 'current_ai_model'
-        }
-        
-        # Step 3: Azure Computer Vision analysis
-        logger.info("Running Azure Computer Vision analysis...")
-        
-        # Reset file pointer for Azure analysis
-        if hasattr(uploaded_file, 'seek'):
-            uploaded_file.seek(0)
+        # Read the upload once; every later step works from these bytes
+        if hasattr(uploaded_file, 'getvalue'):
+            img_bytes = uploaded_file.getvalue()
+        else:
+            img_bytes = uploaded_file.read()
         
-        azure_result = get_azure_image_analysis(uploaded_file)
+        if is_duplicate_image(uploaded_file, digest=content_digest(img_bytes)):
+            return _duplicate_result(uploaded_file, f"Image {uploaded_file.name} already exists in database")
         
-        # Step 4: Groq comparison and conflict resolution
-        logger.info("Using Groq to compare and analyze results...")
+        # Decode once; the perceptual hash and the AI model share this image.
+        # Resized or recompressed copies of an already saved image are
+        # duplicates too; catch them before paying for any recognition calls
+        image = _decode_upload(img_bytes)
+        perceptual_hash = compute_perceptual_hash(image)
+        near_duplicate = _near_duplicate_result(uploaded_file, perceptual_hash)
+        if near_duplicate:
+            return near_duplicate
         
-        azure_animals = azure_result.get('animals', [])
-        image_context = f"Image filename: {uploaded_file.name}, AI description: {ai_description}"
+        return _recognize_upload(uploaded_file, img_bytes, image, perceptual_hash)
         
-        groq_comparison = get_groq_animal_comparison(
-            ai_prediction=ai_animal_name,
-            azure_predictions=azure_animals,
-            image_context=image_context
-        )
-        
-        # Step 5: Determine final recommendation
-        final_result = process_recognition_results(
-            ai_result=ai_result,
-            azure_result=azure_result,
-            groq_comparison=groq_comparison,
-            uploaded_file=uploaded_file
-        )
-        
-        logger.info(f"Enhanced recognition completed for {uploaded_file.name}: {final_result['recommendation']}")
+    except Exception as e:
+        return _recognition_error_result(uploaded_file, e)
+
+@st.cache_data(ttl=3600, max_entries=256, show_spinner=False)
+def _cached_perceptual_hash(digest: str, _img_bytes: bytes):
+    """Perceptual hash keyed on upload content, so reruns skip the decode"""
+    return compute_perceptual_hash(_decode_upload(_img_bytes))
+
+@st.cache_data(ttl=3600, max_entries=256, show_spinner=False)
+def _cached_image_recognition(digest: str, filename: str, _uploaded_file, _img_bytes: bytes,
+                              _perceptual_hash) -> Dict:
+    """
+    Recognition result keyed on upload content and name; the file object is not cached.
+    Failures raise so they are never memoized
+    """
+    result = _recognize_upload(_uploaded_file, _img_bytes, _decode_upload(_img_bytes), _perceptual_hash)
+    if not result.get('success'):
+        raise RuntimeError(result.get('error') or result.get('message'))
+    return {key: value for key, value in result.items() if key != 'file_object'}
+
+def cached_enhanced_image_recognition(uploaded_file) -> Dict:
+    """
+    enhanced_image_recognition, memoized so Streamlit reruns (e.g. after a widget
+    interaction) reuse the result instead of repeating the AI, Azure and Groq calls
+    
+    The memo is shared across sessions, so the exact and near-duplicate checks run
+    fresh on every call (an image saved since it was recognised is reported as a
+    duplicate), and only successful recognitions are memoized.
+    
+    Args:
+        uploaded_file: Streamlit uploaded file object
+    
+    Returns:
+        Dict with comprehensive recognition results
+    """
+    try:
+        img_bytes = uploaded_file.getvalue()
+        digest = content_digest(img_bytes)
+        if is_duplicate_image(uploaded_file, digest=digest):
+            return _duplicate_result(uploaded_file, f"Image {uploaded_file.name} already exists in database")
         
-        return final_result
+        perceptual_hash = _cached_perceptual_hash(digest, img_bytes)
+        near_duplicate = _near_duplicate_result(uploaded_file, perceptual_hash)
+        if near_duplicate:
+            return near_duplicate
         
+        result = _cached_image_recognition(digest, uploaded_file.name, uploaded_file, img_bytes, perceptual_hash)
     except Exception as e:
-        logger.error(f"Enhanced image recognition failed for {uploaded_file.name}: {e}")
-        return {
-            'success': False,
-            'is_duplicate': False,
-            'error': str(e),
-            'message': f"Recognition failed for {uploaded_file.name}",
-            'filename': uploaded_file.name
+        return _recognition_error_result(uploaded_file, e)
+    return dict(result, file_object=uploaded_file)
+
+def enhanced_image_recognition_batch(uploaded_files: List, progress_callback=None) -> List[Dict]:
+    """
+    Run cached_enhanced_image_recognition over several uploads concurrently
+    
+    Args:
+        uploaded_files: List of Streamlit uploaded file objects
+        progress_callback: Optional callable(completed, total), invoked on the calling
+            thread as each upload finishes
+    
+    Returns:
+        List of recognition result dicts in the same order as uploaded_files
+    """
+    results = [None] * len(uploaded_files)
+    if not uploaded_files:
+        return results
+    
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(RECOGNITION_BATCH_WORKERS, len(uploaded_files))
+    ) as executor:
+        future_to_index = {
+            executor.submit(cached_enhanced_image_recognition, uploaded_file): idx
+            for idx, uploaded_file in enumerate(uploaded_files)
         }
+        for completed, future in enumerate(concurrent.futures.as_completed(future_to_index), start=1):
+            results[future_to_index[future]] = future.result()
+            if progress_callback:
+                progress_callback(completed, len(uploaded_files))
+    
+    return results
+
+@dataclass
+class Prediction:
+    """A single animal identification from one source"""
+    name: str
+    type: str
+    description: str
+    source: str
+
+@dataclass
+class PredictionOption(Prediction):
+    """An identification offered to the user when the sources disagree"""
+    confidence: str = ''
+    details: str = ''
+
+def _azure_prediction(azure_animal: Dict) -> Prediction:
+    """Build the final prediction for Azure's top animal"""
+    return Prediction(
+        name=azure_animal['name'],
+        type=categorize_animal(azure_animal['name']),
+        description=f"Identified by Azure Computer Vision (confidence: {azure_animal['confidence']:.2f})",
+        source='azure_computer_vision'
+    )
+
+def _prediction_options(ai_result: Dict, azure_animals: List[Dict]) -> List[PredictionOption]:
+    """Options for user selection: the AI prediction plus the top two Azure predictions"""
+    options = [PredictionOption(
+        name=ai_result['name'],
+        type=ai_result['type'],
+        description=ai_result['description'],
+        source='AI Model',
+        confidence='High',
+        details='Current AI model prediction'
+    )]
+    options.extend(
+        PredictionOption(
+            name=azure_animal['name'],
+            type=categorize_animal(azure_animal['name']),
+            description=f"Detected by Azure (confidence: {azure_animal['confidence']:.2f})",
+            source=f'Azure Computer Vision #{i+1}',
+            confidence=f"{azure_animal['confidence']:.1%}",
+            details=f"Source: {azure_animal.get('source', 'azure')}"
+        )
+        for i, azure_animal in enumerate(azure_animals[:2])
+    )
+    return options
 
 def process_recognition_results(ai_result: Dict, azure_result: Dict, groq_comparison: Dict, uploaded_file) -> Dict:
     """
@@ -102,22 +296,6 @@ def process_recognition_results(ai_result: Dict, azure_result: Dict, groq_compar
         Dict with processed results and recommendations
     """
     try:
-        # Base result structure
-        result = {
-            'success': True,
-            'is_duplicate': False,
-            'filename': uploaded_file.name,
-            'file_object': uploaded_file,
-            'ai_result': ai_result,
-            'azure_result': azure_result,
-            'groq_analysis': groq_comparison,
-            'recommendation': 'single_choice',  # Default
-            'final_prediction': ai_result,
-            'alternatives': [],
-            'user_choice_required': False,
-            'confidence_score': 0.8
-        }
-        
         # Analyze Groq recommendation
         groq_recommendation = groq_comparison.get('recommendation', 'user_choice')
         same_animal = groq_comparison.get('same_animal', False)
@@ -127,71 +305,58 @@ def process_recognition_results(ai_result: Dict, azure_result: Dict, groq_compar
         
         if groq_recommendation == 'use_ai' or (same_animal and confidence >= 75):
             # AI prediction confirmed or strongly preferred
-            result['recommendation'] = 'confirmed'
-            result['final_prediction'] = ai_result
-            result['confidence_score'] = min(0.95, confidence / 100.0)
-            result['message'] = f"AI prediction '{ai_result['name']}' confirmed"
-            
+            message = f"AI prediction '{ai_result['name']}' confirmed"
             if azure_animals:
-                result['message'] += f" (Azure also detected: {azure_animals[0]['name']})"
+                message += f" (Azure also detected: {azure_animals[0]['name']})"
+            outcome = {
+                'recommendation': 'confirmed',
+                'final_prediction': ai_result,
+                'alternatives': [],
+                'user_choice_required': False,
+                'confidence_score': min(0.95, confidence / 100.0),
+                'message': message
+            }
         
         elif groq_recommendation == 'use_azure' and azure_animals:
             # Azure prediction preferred
-            result['recommendation'] = 'azure_preferred'
-            result['final_prediction'] = {
-                'name': azure_animals[0]['name'],
-                'type': categorize_animal(azure_animals[0]['name']),
-                'description': f"Identified by Azure Computer Vision (confidence: {azure_animals[0]['confidence']:.2f})",
-                'source': 'azure_computer_vision'
+            outcome = {
+                'recommendation': 'azure_preferred',
+                'final_prediction': asdict(_azure_prediction(azure_animals[0])),
+                'alternatives': [],
+                'user_choice_required': False,
+                'confidence_score': azure_animals[0]['confidence'],
+                'message': f"Azure prediction '{azure_animals[0]['name']}' preferred over AI prediction"
             }
-            result['confidence_score'] = azure_animals[0]['confidence']
-            result['message'] = f"Azure prediction '{azure_animals[0]['name']}' preferred over AI prediction"
         
         else:
             # Conflicting results - require user choice
-            result['recommendation'] = 'user_choice'
-            result['user_choice_required'] = True
-            result['confidence_score'] = confidence / 100.0
-            
-            # Prepare options for user selection
-            options = []
-            
-            # Option 1: AI prediction
-            options.append({
-                'source': 'AI Model',
-                'name': ai_result['name'],
-                'type': ai_result['type'],
-                'description': ai_result['description'],
-                'confidence': 'High',
-                'details': 'Current AI model prediction'
-            })
-            
-            # Option 2: Azure prediction (if available)
-            if azure_animals:
-                for i, azure_animal in enumerate(azure_animals[:2]):  # Top 2 Azure predictions
-                    options.append({
-                        'source': f'Azure Computer Vision #{i+1}',
-                        'name': azure_animal['name'],
-                        'type': categorize_animal(azure_animal['name']),
-                        'description': f"Detected by Azure (confidence: {azure_animal['confidence']:.2f})",
-                        'confidence': f"{azure_animal['confidence']:.1%}",
-                        'details': f"Source: {azure_animal.get('source', 'azure')}"
-                    })
-            
-            result['alternatives'] = options
-            result['message'] = "Multiple predictions found. Please choose the most accurate identification."
+            outcome = {
+                'recommendation': 'user_choice',
+                'final_prediction': ai_result,
+                'alternatives': [asdict(option) for option in _prediction_options(ai_result, azure_animals)],
+                'user_choice_required': True,
+                'confidence_score': confidence / 100.0,
+                'message': "Multiple predictions found. Please choose the most accurate identification."
+            }
         
-        # Add additional metadata
-        result['analysis_summary'] = {
-            'ai_prediction': ai_result['name'],
-            'azure_predictions': len(azure_animals),
-            'groq_confidence': confidence,
-            'similarity_score': groq_comparison.get('similarity_score', 0.0),
-            'processing_successful': True
+        return {
+            'success': True,
+            'is_duplicate': False,
+            'filename': uploaded_file.name,
+            'file_object': uploaded_file,
+            'ai_result': ai_result,
+            'azure_result': azure_result,
+            'groq_analysis': groq_comparison,
+            **outcome,
+            'analysis_summary': {
+                'ai_prediction': ai_result['name'],
+                'azure_predictions': len(azure_animals),
+                'groq_confidence': confidence,
+                'similarity_score': groq_comparison.get('similarity_score', 0.0),
+                'processing_successful': True
+            }
         }
         
-        return result
-        
     except Exception as e:
         logger.error(f"Error processing recognition results: {e}")
         return {
@@ -202,70 +367,71 @@ def process_recognition_results(ai_result: Dict, azure_result: Dict, groq_compar
             'filename': uploaded_file.name if uploaded_file else 'unknown'
         }
 
-def categorize_animal(animal_name: str) -> str:
-    """
-    Categorize an animal name into broad categories
-    
-    Args:
-        animal_name: Name of the animal
-    
-    Returns:
-        String category (Bird, Mammal, Reptile, etc.)
-    """
-    animal_lower = animal_name.lower()
-    
-    # Bird keywords
-    bird_keywords = [
+# Keyword tables for categorize_animal, in precedence order (first category wins)
+ANIMAL_CATEGORY_KEYWORDS = {
+    'Bird': [
         'bird', 'eagle', 'hawk', 'owl', 'parrot', 'penguin', 'flamingo', 'peacock',
         'duck', 'goose', 'swan', 'chicken', 'turkey', 'pigeon', 'crow', 'raven',
         'sparrow', 'robin', 'cardinal', 'blue jay', 'woodpecker', 'hummingbird'
-    ]
-    
-    # Mammal keywords
-    mammal_keywords = [
+    ],
+    'Mammal': [
         'mammal', 'dog', 'cat', 'lion', 'tiger', 'elephant', 'bear', 'wolf',
         'fox', 'deer', 'horse', 'cow', 'sheep', 'goat', 'pig', 'rabbit',
         'squirrel', 'mouse', 'rat', 'monkey', 'gorilla', 'zebra', 'giraffe'
-    ]
-    
-    # Reptile keywords
-    reptile_keywords = [
-        'reptile', 'snake', 'lizard', 'turtle', 'tortoise', 'crocodile', 
+    ],
+    'Reptile': [
+        'reptile', 'snake', 'lizard', 'turtle', 'tortoise', 'crocodile',
         'alligator', 'iguana', 'gecko', 'chameleon'
-    ]
-    
-    # Fish keywords
-    fish_keywords = [
+    ],
+    'Fish': [
         'fish', 'shark', 'salmon', 'tuna', 'goldfish', 'bass', 'trout',
         'cod', 'swordfish', 'angel fish'
-    ]
-    
-    # Amphibian keywords
-    amphibian_keywords = [
+    ],
+    'Amphibian': [
         'amphibian', 'frog', 'toad', 'salamander', 'newt'
-    ]
-    
-    # Insect keywords
-    insect_keywords = [
+    ],
+    'Insect': [
         'insect', 'bug', 'butterfly', 'bee', 'ant', 'beetle', 'fly',
         'dragonfly', 'moth', 'mosquito', 'spider', 'wasp'
     ]
+}
+
+CATEGORY_PRECEDENCE = {category: rank for rank, category in enumerate(ANIMAL_CATEGORY_KEYWORDS)}
+
+KEYWORD_TO_CATEGORY = {}
+for _category, _keywords in ANIMAL_CATEGORY_KEYWORDS.items():
+    for _keyword in _keywords:
+        KEYWORD_TO_CATEGORY.setdefault(_keyword, _category)
+
+# Zero-width lookahead so overlapping keywords are all reported in one scan;
+# alternatives are ordered by category precedence, then longest keyword first
+_CATEGORY_KEYWORD_PATTERN = re.compile(
+    '(?=(' + '|'.join(
+        re.escape(keyword) for keyword in sorted(
+            KEYWORD_TO_CATEGORY,
+            key=lambda kw: (CATEGORY_PRECEDENCE[KEYWORD_TO_CATEGORY[kw]], -len(kw))
+        )
+    ) + '))'
+)
+
+@lru_cache(maxsize=4096)
+def categorize_animal(animal_name: str) -> str:
+    """
+    Categorize an animal name into broad categories
     
-    # Check categories
-    if any(keyword in animal_lower for keyword in bird_keywords):
-        return 'Bird'
-    elif any(keyword in animal_lower for keyword in mammal_keywords):
-        return 'Mammal'
-    elif any(keyword in animal_lower for keyword in reptile_keywords):
-        return 'Reptile'
-    elif any(keyword in animal_lower for keyword in fish_keywords):
-        return 'Fish'
-    elif any(keyword in animal_lower for keyword in amphibian_keywords):
-        return 'Amphibian'
-    elif any(keyword in animal_lower for keyword in insect_keywords):
-        return 'Insect'
-    else:
+    Args:
+        animal_name: Name of the animal
+    
+    Returns:
+        String category (Bird, Mammal, Reptile, etc.)
+    """
+    categories = {
+        KEYWORD_TO_CATEGORY[match.group(1)]
+        for match in _CATEGORY_KEYWORD_PATTERN.finditer(animal_name.lower())
+    }
+    if not categories:
         return 'Other'
+    return min(categories, key=CATEGORY_PRECEDENCE.__getitem__)
 
 def create_user_choice_interface(recognition_result: Dict) -> Optional[Dict]:
     """
@@ -286,27 +452,25 @@ def create_user_choice_interface(recognition_result: Dict) -> Optional[Dict]:
     
     st.warning("🤔 **Multiple animal identifications found!** Please choose the most accurate one:")
     
-    # Create radio button options
-    option_labels = []
-    option_data = []
-    
-    for i, option in enumerate(alternatives):
-        label = f"**{option['name']}** ({option['source']}) - Confidence: {option['confidence']}"
-        option_labels.append(label)
-        option_data.append(option)
+    # Labels are rebuilt from this result's alternatives so they always match option_data
+    option_labels = tuple(
+        f"**{option['name']}** ({option['source']}) - Confidence: {option['confidence']}"
+        for option in alternatives
+    ) + ("**Other** (I'll type the correct animal name)",)
+    option_data = alternatives + [{'source': 'user_input', 'name': 'other'}]
     
-    # Add "Other" option
-    option_labels.append("**Other** (I'll type the correct animal name)")
-    option_data.append({'source': 'user_input', 'name': 'other'})
-    
-    # User selection
+    # User selection; nothing is selected until the user picks an option
     selected_index = st.radio(
         "Choose the correct animal identification:",
         range(len(option_labels)),
-        format_func=lambda x: option_labels[x],
+        index=None,
+        format_func=option_labels.__getitem__,
         key=f"animal_choice_{recognition_result['filename']}"
     )
     
+    if selected_index is None:
+        return None  # Wait for user selection
+    
     selected_option = option_data[selected_index]
     
     # Handle "Other" option
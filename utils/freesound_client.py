@@ -1,25 +1,137 @@
 # utils/freesound_client.py
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import numpy as np
 import streamlit as st
 import logging
+import concurrent.futures
+import re
+import threading
+import time
 from typing import Optional
 
+try:
+    import httpx
+    import h2  # noqa: F401 - required for httpx's HTTP/2 support
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Read once at import rather than on every client construction
+try:
+    _API_KEY = st.secrets.get("freesound_api_key", "")
+except Exception:
+    _API_KEY = ""
+
+# Best-sound URLs are remembered per (animal, max duration) for this long
+SOUND_CACHE_TTL = 3600
+SOUND_CACHE_MAXSIZE = 512
+
+# How long to wait for the download redirect before settling for the preview
+DOWNLOAD_RESOLVE_TIMEOUT = 1.5
+
+# Transient rate-limit/5xx responses are retried with exponential backoff on both HTTP clients
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.2  # seconds, doubled per retry
+
+# Description keywords that suggest a genuine animal recording (+10 each)
+ANIMAL_SOUND_KEYWORDS = frozenset((
+    'animal', 'wildlife', 'nature', 'bird', 'mammal', 'call', 'sound', 'vocalization'
+))
+_ANIMAL_KEYWORD_RE = re.compile('|'.join(sorted(ANIMAL_SOUND_KEYWORDS)), re.IGNORECASE)
+
+def _select_best_sound(sounds: list, animal_name: str) -> Optional[dict]:
+    """
+    Score FreeSound search results and return the best one
+    
+    Args:
+        sounds: Search results with name, description, duration and rating fields
+        animal_name: Name of the animal searched for
+        
+    Returns:
+        The highest scoring sound, or None if no sound scores above zero
+    """
+    animal_lower = animal_name.lower()
+    name_matches = np.array([animal_lower in (sound.get('name') or '').lower() for sound in sounds])
+    # Case-insensitive scan of the raw description; only the few matches get lowercased
+    keyword_counts = np.array([
+        len({match.lower() for match in _ANIMAL_KEYWORD_RE.findall(sound.get('description') or '')})
+        for sound in sounds
+    ])
+    durations = np.array([sound.get('duration') or 0 for sound in sounds], dtype=float)
+    ratings = np.array([sound.get('rating') or 0 for sound in sounds], dtype=float)
+    
+    scores = (
+        # Exact match in name gets highest score
+        100 * name_matches
+        # Each distinct animal-related keyword in the description
+        + 10 * keyword_counts
+        # Prefer shorter sounds for quick identification
+        + np.select([durations <= 1, durations <= 5, durations <= 15], [50, 30, 10], 0)
+        # Rating bonus, max 25 points
+        + np.minimum(ratings * 5, 25)
+    )
+    
+    best = int(scores.argmax())
+    return sounds[best] if scores[best] > 0 else None
+
 class FreeSoundClient:
     """Client for FreeSound.org API to fetch animal sounds"""
     
     def __init__(self):
         self.base_url = "https://freesound.org/apiv2"
-        self.api_key = st.secrets.get("freesound_api_key", "")
+        self.api_key = _API_KEY
         self.session = requests.Session()
+        # Keep TLS connections to freesound.org warm across concurrent lookups
+        # and absorb transient rate-limit/5xx responses
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=32,
+            max_retries=Retry(total=RETRY_TOTAL, backoff_factor=RETRY_BACKOFF, status_forcelist=sorted(RETRY_STATUSES))
+        )
+        self.session.mount('https://', adapter)
+        
+        self._sound_cache = {}
+        self._sound_cache_lock = threading.Lock()
+        self._download_executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
         
         if self.api_key:
             self.session.headers.update({
                 'Authorization': f'Token {self.api_key}',
                 'User-Agent': 'NatureTrace/1.0 (Educational Research)'
             })
+        
+        # With httpx, the search and download requests are multiplexed over a
+        # single HTTP/2 connection instead of separate HTTP/1.1 round-trips
+        self.client = None
+        if HTTPX_AVAILABLE:
+            self.client = httpx.Client(
+                headers=dict(self.session.headers),
+                timeout=15.0,
+                transport=httpx.HTTPTransport(
+                    http2=True,
+                    retries=3,
+                    limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+                )
+            )
+    
+    def _get(self, url: str, params: dict = None, timeout: float = 15, allow_redirects: bool = True):
+        """GET through the HTTP/2 client when available, otherwise the pooled requests session"""
+        if self.client is None:
+            return self.session.get(url, params=params, timeout=timeout, allow_redirects=allow_redirects)
+        
+        # httpx's transport only retries failed connections, so retry statuses here
+        for attempt in range(RETRY_TOTAL + 1):
+            response = self.client.get(url, params=params, timeout=timeout, follow_redirects=allow_redirects)
+            if response.status_code not in RETRY_STATUSES or attempt == RETRY_TOTAL:
+                return response
+            response.close()
+            time.sleep(RETRY_BACKOFF * 2 ** attempt)
     
     def get_best_animal_sound(self, animal_name: str, max_duration: int = 30) -> Optional[str]:
         """
@@ -35,7 +147,25 @@ class FreeSoundClient:
         if not self.api_key:
             logger.warning("FreeSound API key not configured - skipping FreeSound search")
             return None
-            
+        
+        cache_key = (animal_name.lower().strip(), max_duration)
+        with self._sound_cache_lock:
+            cached = self._sound_cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < SOUND_CACHE_TTL:
+            return cached[1]
+        
+        sound_url = self._search_best_sound(animal_name, max_duration)
+        if sound_url:
+            with self._sound_cache_lock:
+                if len(self._sound_cache) >= SOUND_CACHE_MAXSIZE:
+                    # Evict the oldest entry (dicts keep insertion order)
+                    self._sound_cache.pop(next(iter(self._sound_cache)))
+                self._sound_cache.pop(cache_key, None)
+                self._sound_cache[cache_key] = (time.monotonic(), sound_url)
+        return sound_url
+    
+    def _search_best_sound(self, animal_name: str, max_duration: int) -> Optional[str]:
+        """Search FreeSound and resolve a URL for the best match (uncached)"""
         try:
             # Search for animal sounds
             search_params = {
@@ -46,7 +176,7 @@ class FreeSoundClient:
                 'page_size': 20
             }
             
-            response = self.session.get(
+            response = self._get(
                 f"{self.base_url}/search/text/",
                 params=search_params,
                 timeout=15
@@ -61,73 +191,49 @@ class FreeSoundClient:
             else:
                 logger.error(f"FreeSound API error {response.status_code}: {response.text[:100]}")
                 return None
-                
-                if sounds:
-                    # Score and rank sounds
-                    scored_sounds = []
-                    animal_lower = animal_name.lower()
-                    
-                    for sound in sounds:
-                        score = 0
-                        name = sound.get('name', '').lower()
-                        description = sound.get('description', '').lower()
-                        
-                        # Exact match in name gets highest score
-                        if animal_lower in name:
-                            score += 100
-                        
-                        # Check description for animal-related keywords
-                        animal_keywords = ['animal', 'wildlife', 'nature', 'bird', 'mammal', 'call', 'sound', 'vocalization']
-                        for keyword in animal_keywords:
-                            if keyword in description:
-                                score += 10
-                        
-                        # Prefer shorter sounds for quick identification
-                        duration = sound.get('duration', 0)
-                        if duration <= 1:
-                            score += 50
-                        elif duration <= 5:
-                            score += 30
-                        elif duration <= 15:
-                            score += 10
-                        
-                        # Rating bonus
-                        rating = sound.get('rating', 0)
-                        if rating:
-                            score += min(rating * 5, 25)  # Max 25 points for rating
-                        
-                        if score > 0:
-                            scored_sounds.append((score, sound))
-                    
-                    if scored_sounds:
-                        # Sort by score and get the best one
-                        scored_sounds.sort(reverse=True, key=lambda x: x[0])
-                        best_sound = scored_sounds[0][1]
-                        
-                        # Get download URL
-                        sound_id = best_sound.get('id')
-                        if sound_id:
-                            # Try to get direct download URL
-                            download_response = self.session.get(
-                                f"{self.base_url}/sounds/{sound_id}/download/",
-                                timeout=10,
-                                allow_redirects=False
-                            )
-                            
-                            if download_response.status_code == 302:
-                                # Redirect location is the download URL
-                                download_url = download_response.headers.get('Location')
-                                if download_url:
-                                    logger.info(f"FreeSound found: {best_sound.get('name')} (rating: {best_sound.get('rating', 'N/A')})")
-                                    return download_url
-                            
-                            # Fallback to preview URL if download fails
-                            previews = best_sound.get('previews', {})
-                            if previews.get('preview-hq-mp3'):
-                                logger.info(f"FreeSound fallback preview: {best_sound.get('name')}")
-                                return previews['preview-hq-mp3']
-                            elif previews.get('preview-lq-mp3'):
-                                return previews['preview-lq-mp3']
+            
+            if not sounds:
+                return None
+            
+            best_sound = _select_best_sound(sounds, animal_name)
+            if not best_sound:
+                return None
+            
+            # Resolve the download redirect in the background while picking the preview
+            sound_id = best_sound.get('id')
+            download_future = None
+            if sound_id:
+                download_future = self._download_executor.submit(
+                    self._get,
+                    f"{self.base_url}/sounds/{sound_id}/download/",
+                    timeout=10,
+                    allow_redirects=False
+                )
+            
+            previews = best_sound.get('previews') or {}
+            preview_url = previews.get('preview-hq-mp3') or previews.get('preview-lq-mp3')
+            
+            if download_future is not None:
+                try:
+                    # Without a preview to fall back on, wait for the download to resolve
+                    download_response = download_future.result(
+                        timeout=DOWNLOAD_RESOLVE_TIMEOUT if preview_url else None
+                    )
+                    if download_response.status_code == 302:
+                        # Redirect location is the download URL
+                        download_url = download_response.headers.get('Location')
+                        if download_url:
+                            logger.info(f"FreeSound found: {best_sound.get('name')} (rating: {best_sound.get('rating', 'N/A')})")
+                            return download_url
+                except concurrent.futures.TimeoutError:
+                    logger.info(f"FreeSound download URL slow to resolve, using preview: {best_sound.get('name')}")
+                except Exception as e:
+                    logger.warning(f"FreeSound download URL lookup failed: {e}")
+            
+            # Fallback to preview URL if download fails
+            if preview_url:
+                logger.info(f"FreeSound fallback preview: {best_sound.get('name')}")
+                return preview_url
             
             return None
             
@@ -141,7 +247,7 @@ class FreeSoundClient:
             return {"success": False, "error": "No API key configured"}
         
         try:
-            response = self.session.get(f"{self.base_url}/me/", timeout=10)
+            response = self._get(f"{self.base_url}/me/", timeout=10)
             if response.status_code == 200:
                 user_data = response.json()
                 return {
@@ -162,5 +268,10 @@ class FreeSoundClient:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+@st.cache_resource
+def get_freesound_client() -> FreeSoundClient:
+    """Shared FreeSoundClient, so its session and sound cache survive module reloads"""
+    return FreeSoundClient()
+
 # Global instance
-freesound_client = FreeSoundClient()
+freesound_client = get_freesound_client()
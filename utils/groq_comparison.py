@@ -2,12 +2,84 @@
 
 import streamlit as st
 from groq import Groq
+import httpx
 import json
 import logging
 from typing import Dict, List, Optional
+from utils.llm_cache import llm_cache, CACHEABLE_MAX_TEMPERATURE
 
 logger = logging.getLogger(__name__)
 
+# Prompts are split into a fixed prefix (role, task, JSON schema) followed by the
+# per-request values, so repeated calls share an identical cacheable prefix
+COMPARISON_SYSTEM_PROMPT = (
+    "You are an expert zoologist who helps compare animal identification results "
+    "from different AI systems. Return only a JSON object."
+)
+
+COMPARISON_PROMPT_PREFIX = """
+You are an expert zoologist and AI system evaluator. Please analyze the animal identification results given at the end of this message.
+
+Please analyze these predictions and provide:
+1. Are the predictions referring to the same animal or very similar animals?
+2. Which prediction is most likely correct?
+3. What is your confidence level (0-100)?
+4. Brief reasoning for your assessment
+
+Respond in JSON format:
+{
+    "same_animal": true/false,
+    "most_likely_correct": "ai_prediction" or "azure_prediction" or "uncertain",
+    "confidence": 0-100,
+    "reasoning": "brief explanation",
+    "recommendation": "use_ai" or "use_azure" or "user_choice",
+    "similarity_score": 0.0-1.0
+}
+
+Be concise and focus on biological accuracy. Consider that the AI model might be more specific while Azure might be more general.
+
+Identification results:
+"""
+
+CONFIDENCE_SYSTEM_PROMPT = (
+    "You are an expert zoologist who assesses animal classifications. "
+    "Return only a JSON object."
+)
+
+CONFIDENCE_PROMPT_PREFIX = """
+As an expert zoologist, please assess the animal classification given at the end of this message.
+
+Provide your assessment in JSON format:
+{
+    "confidence": 0-100,
+    "is_specific": true/false,
+    "is_accurate": true/false,
+    "classification_level": "species/genus/family/order/class",
+    "suggestions": ["alternative name if applicable"],
+    "reasoning": "brief explanation"
+}
+
+Focus on biological accuracy and specificity.
+"""
+
+@st.cache_resource
+def _get_groq_client(api_key: str) -> Groq:
+    """Shared Groq client, so requests reuse one warm connection pool"""
+    return Groq(
+        api_key=api_key,
+        http_client=httpx.Client(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        )
+    )
+
+def _log_cached_tokens(chat_completion) -> None:
+    """Log how many prompt tokens Groq served from its prefix cache, when reported"""
+    usage = getattr(chat_completion, 'usage', None)
+    details = getattr(usage, 'prompt_tokens_details', None)
+    cached_tokens = getattr(details, 'cached_tokens', None)
+    if cached_tokens is not None:
+        logger.info(f"Groq prompt cache: {cached_tokens}/{usage.prompt_tokens} prompt tokens cached")
+
 def get_groq_animal_comparison(ai_prediction: str, azure_predictions: List[Dict], image_context: str = "") -> Dict:
     """
     Use Groq AI to compare and analyze animal predictions from different sources
@@ -31,7 +103,7 @@ def get_groq_animal_comparison(ai_prediction: str, azure_predictions: List[Dict]
                 'confidence': 0.0
             }
         
-        client = Groq(api_key=groq_api_key)
+        client = _get_groq_client(groq_api_key)
         
         # Prepare Azure predictions text
         azure_text = "No specific animals detected"
@@ -41,43 +113,21 @@ def get_groq_animal_comparison(ai_prediction: str, azure_predictions: List[Dict]
                 for pred in azure_predictions[:3]  # Top 3 predictions
             ])
         
-        # Create prompt for Groq
-        prompt = f"""
-You are an expert zoologist and AI system evaluator. Please analyze these animal identification results:
-
+        # Static instructions first, per-image values last, so the shared prefix
+        # can be served from Groq's prompt cache
+        prompt = COMPARISON_PROMPT_PREFIX + f"""
 **Current AI Model Prediction:** {ai_prediction}
 
 **Azure Computer Vision Predictions:** {azure_text}
 
 **Image Context:** {image_context if image_context else "No additional context provided"}
-
-Please analyze these predictions and provide:
-1. Are the predictions referring to the same animal or very similar animals?
-2. Which prediction is most likely correct?
-3. What is your confidence level (0-100)?
-4. Brief reasoning for your assessment
-
-Respond in JSON format:
-{{
-    "same_animal": true/false,
-    "most_likely_correct": "ai_prediction" or "azure_prediction" or "uncertain",
-    "confidence": 0-100,
-    "reasoning": "brief explanation",
-    "recommendation": "use_ai" or "use_azure" or "user_choice",
-    "similarity_score": 0.0-1.0
-}}
-
-Be concise and focus on biological accuracy. Consider that the AI model might be more specific while Azure might be more general.
 """
         
-        # Make Groq API call
-        logger.info("Sending comparison request to Groq...")
-        
-        chat_completion = client.chat.completions.create(
+        request = dict(
             messages=[
                 {
                     "role": "system",
-                    "content": "You are an expert zoologist who helps compare animal identification results from different AI systems. Always respond in valid JSON format."
+                    "content": COMPARISON_SYSTEM_PROMPT
                 },
                 {
                     "role": "user",
@@ -86,19 +136,29 @@ Be concise and focus on biological accuracy. Consider that the AI model might be
             ],
             model="llama3-8b-8192",  # Fast model for quick responses
             temperature=0.3,  # Low temperature for consistent, factual responses
-            max_tokens=500
+            max_tokens=500,
+            response_format={"type": "json_object"}  # Constrained decoding: always a bare JSON object
         )
         
-        response_text = chat_completion.choices[0].message.content.strip()
+        # Identical comparisons (same predictions and context) reuse the earlier answer
+        cache_key = None
+        if request['temperature'] <= CACHEABLE_MAX_TEMPERATURE:
+            cache_key = llm_cache.make_key(**request)
+            cached = llm_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Groq comparison served from cache: {cached['recommendation']}")
+                return dict(cached)
+        
+        # Make Groq API call
+        logger.info("Sending comparison request to Groq...")
+        
+        chat_completion = client.chat.completions.create(**request)
+        _log_cached_tokens(chat_completion)
+        
+        response_text = chat_completion.choices[0].message.content
         
         # Parse JSON response
         try:
-            # Clean the response in case there are markdown code blocks
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].strip()
-            
             result = json.loads(response_text)
             
             # Validate and normalize response
@@ -112,6 +172,9 @@ Be concise and focus on biological accuracy. Consider that the AI model might be
             
             logger.info(f"Groq comparison completed: {result['recommendation']} (confidence: {result['confidence']}%)")
             
+            if cache_key:
+                llm_cache.set(cache_key, result)
+            
             return result
             
         except json.JSONDecodeError as e:
@@ -147,8 +210,9 @@ def create_fallback_comparison(ai_prediction: str, azure_predictions: List[Dict]
             'similarity_score': 0.0
         }
     
-    # Simple string matching
+    # Simple string matching; the AI side is tokenized once for all predictions
     ai_lower = ai_prediction.lower()
+    ai_words = set(ai_lower.split())
     best_match_score = 0.0
     
     for azure_pred in azure_predictions:
@@ -164,10 +228,10 @@ def create_fallback_comparison(ai_prediction: str, azure_predictions: List[Dict]
             best_match_score = max(best_match_score, 0.8)
         
         # Check for word overlap
-        ai_words = set(ai_lower.split())
         azure_words = set(azure_lower.split())
-        if ai_words.intersection(azure_words):
-            overlap_score = len(ai_words.intersection(azure_words)) / len(ai_words.union(azure_words))
+        common_words = ai_words & azure_words
+        if common_words:
+            overlap_score = len(common_words) / len(ai_words | azure_words)
             best_match_score = max(best_match_score, overlap_score)
     
     same_animal = best_match_score >= 0.7
@@ -207,31 +271,19 @@ def get_animal_classification_confidence(prediction: str, context: str = "") ->
         if not groq_api_key:
             return {'success': False, 'confidence': 50, 'reasoning': 'Groq API not available'}
         
-        client = Groq(api_key=groq_api_key)
+        client = _get_groq_client(groq_api_key)
         
-        prompt = f"""
-As an expert zoologist, please assess the animal classification: "{prediction}"
+        prompt = CONFIDENCE_PROMPT_PREFIX + f"""
+Animal classification: "{prediction}"
 
 Context: {context if context else "No additional context"}
-
-Provide your assessment in JSON format:
-{{
-    "confidence": 0-100,
-    "is_specific": true/false,
-    "is_accurate": true/false,
-    "classification_level": "species/genus/family/order/class",
-    "suggestions": ["alternative name if applicable"],
-    "reasoning": "brief explanation"
-}}
-
-Focus on biological accuracy and specificity.
 """
         
-        chat_completion = client.chat.completions.create(
+        request = dict(
             messages=[
                 {
                     "role": "system",
-                    "content": "You are an expert zoologist who assesses animal classifications. Always respond in valid JSON format."
+                    "content": CONFIDENCE_SYSTEM_PROMPT
                 },
                 {
                     "role": "user",
@@ -240,20 +292,26 @@ Focus on biological accuracy and specificity.
             ],
             model="llama3-8b-8192",
             temperature=0.2,
-            max_tokens=300
+            max_tokens=300,
+            response_format={"type": "json_object"}
         )
         
-        response_text = chat_completion.choices[0].message.content.strip()
+        cache_key = None
+        if request['temperature'] <= CACHEABLE_MAX_TEMPERATURE:
+            cache_key = llm_cache.make_key(**request)
+            cached = llm_cache.get(cache_key)
+            if cached is not None:
+                return dict(cached)
         
-        # Parse response
-        if "```json" in response_text:
-            response_text = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            response_text = response_text.split("```")[1].strip()
+        chat_completion = client.chat.completions.create(**request)
+        _log_cached_tokens(chat_completion)
         
-        result = json.loads(response_text)
+        result = json.loads(chat_completion.choices[0].message.content)
         result['success'] = True
         
+        if cache_key:
+            llm_cache.set(cache_key, result)
+        
         return result
         
     except Exception as e:
@@ -1,25 +1,259 @@
 import time
+import random
 import concurrent.futures
+import functools
+import re
 from PIL import Image
 import streamlit as st
 import hashlib
 import io
+import os
+import threading
 import numpy as np
 import cv2
 
+try:
+    import imagehash
+    IMAGEHASH_AVAILABLE = True
+except ImportError:
+    IMAGEHASH_AVAILABLE = False
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import httpx
+    import h2  # noqa: F401 - required for httpx's HTTP/2 support
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+try:
+    import onnxruntime  # noqa: F401 - backend for the exported YOLO model
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+try:
+    from diskcache import Cache
+    _prediction_cache = Cache(os.path.join(".cache", "naturetrace_predictions"), size_limit=2 ** 30)
+except ImportError:
+    _prediction_cache = None
+
 # Store processed image hashes to detect duplicates
 processed_images = set()
 
+# Perceptual hashes of saved images (one per filename), persisted so resized or
+# recompressed re-uploads are caught before the recognition pipeline runs
+PERCEPTUAL_HASH_STORE = os.path.join(".cache", "naturetrace_saved_phash.npz")
+NEAR_DUPLICATE_MAX_DISTANCE = 6
+_perceptual_hashes = None
+_perceptual_filenames = None
+_perceptual_lock = threading.Lock()
+
+# Opt-in INT8 (static, per-channel) quantization of the ONNX detector for CPU
+# hosts, calibrated on sample photos from YOLO_CALIBRATION_DIR
+try:
+    YOLO_INT8 = bool(st.secrets.get("yolo_int8", False))
+    YOLO_CALIBRATION_DIR = st.secrets.get("yolo_calibration_dir", "Images")
+except Exception:
+    YOLO_INT8 = False
+    YOLO_CALIBRATION_DIR = "Images"
+YOLO_CALIBRATION_IMAGES = 50
+
+# Identification results keyed by decoded pixel content. Bump the version tag
+# whenever the detector weights or classification logic change so stale
+# predictions are never served.
+PREDICTION_CACHE_VERSION = "yolov8l-4"
+# Suffix for the detector variant that actually loaded ("-int8" only when the
+# quantized model is in use); set by load_yolo_model
+_yolo_variant_tag = ""
+PREDICTION_CACHE_EXPIRE = 7 * 24 * 3600
+PREDICTION_MEMORY_MAXSIZE = 256
+_recent_predictions = {}
+_recent_predictions_lock = threading.Lock()
+
+# Cap on concurrent Groq vision requests, so chunked fan-out stays inside the
+# provider's rate limits instead of stalling the whole batch on 429 retries
+try:
+    GROQ_MAX_CONCURRENCY = int(st.secrets.get("groq_max_concurrency", 8))
+except Exception:
+    GROQ_MAX_CONCURRENCY = 8
+GROQ_RATE_LIMIT_RETRIES = 4
+GROQ_VISION_MAX_SIDE = 1024
+_groq_semaphore = threading.BoundedSemaphore(GROQ_MAX_CONCURRENCY)
+
+# Single-image detections from concurrent uploads are coalesced into batched
+# YOLO passes: the first caller waits briefly for others to join, then runs
+# everything queued in batches of up to YOLO_BATCH_MAX_SIZE
+YOLO_BATCH_MAX_SIZE = 8
+YOLO_BATCH_WAIT = 0.02  # seconds
+_yolo_lock = threading.RLock()  # The shared model is not thread-safe
+_yolo_pending = []
+_yolo_pending_lock = threading.Lock()
+
+def _groq_chat_completion(client, **kwargs):
+    """
+    Create a Groq chat completion under the shared concurrency cap, retrying
+    rate-limit errors with randomized exponential backoff (1s doubling, max 30s).
+    """
+    from groq import RateLimitError
+
+    for attempt in range(GROQ_RATE_LIMIT_RETRIES + 1):
+        try:
+            with _groq_semaphore:
+                return client.chat.completions.create(**kwargs)
+        except RateLimitError:
+            if attempt == GROQ_RATE_LIMIT_RETRIES:
+                raise
+            time.sleep(random.uniform(0, min(30, 2 ** attempt)))
+
+@functools.lru_cache(maxsize=1)
+def _yolo_device():
+    """Run YOLO on the first CUDA GPU when one is available, otherwise on CPU"""
+    try:
+        import torch
+        return 0 if torch.cuda.is_available() else 'cpu'
+    except ImportError:
+        return 'cpu'
+
+YOLO_WEIGHTS = 'yolov8l.pt'
+YOLO_ONNX_PATH = 'yolov8l.onnx'
+YOLO_INT8_ONNX_PATH = 'yolov8l.int8.onnx'
+YOLO_INPUT_SIZE = 640
+
+def _yolo_input_tensor(image):
+    """Letterbox an RGB PIL image to the YOLO input size as a float32 NCHW tensor"""
+    scale = YOLO_INPUT_SIZE / max(image.size)
+    resized = image.resize(
+        (max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.BILINEAR
+    )
+    canvas = Image.new('RGB', (YOLO_INPUT_SIZE, YOLO_INPUT_SIZE), (114, 114, 114))
+    canvas.paste(resized, ((YOLO_INPUT_SIZE - resized.width) // 2, (YOLO_INPUT_SIZE - resized.height) // 2))
+    tensor = np.asarray(canvas, dtype=np.float32) / 255.0
+    return tensor.transpose(2, 0, 1)[np.newaxis]
+
+def _quantize_yolo_onnx():
+    """
+    Statically quantize the exported ONNX model to INT8, once
+    Returns:
+        str: Path of the INT8 model, or None if there are no calibration images or quantization fails
+    """
+    if os.path.exists(YOLO_INT8_ONNX_PATH):
+        return YOLO_INT8_ONNX_PATH
+    try:
+        from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+        
+        image_paths = sorted(
+            os.path.join(YOLO_CALIBRATION_DIR, name) for name in os.listdir(YOLO_CALIBRATION_DIR)
+            if name.lower().endswith(('.jpg', '.jpeg', '.png'))
+        )[:YOLO_CALIBRATION_IMAGES]
+        if not image_paths:
+            print(f"Warning: No calibration images in {YOLO_CALIBRATION_DIR}; INT8 quantization skipped")
+            return None
+        
+        input_name = onnxruntime.InferenceSession(
+            YOLO_ONNX_PATH, providers=['CPUExecutionProvider']
+        ).get_inputs()[0].name
+        
+        class _CalibrationReader(CalibrationDataReader):
+            def __init__(self):
+                self._feeds = (
+                    {input_name: _yolo_input_tensor(Image.open(path).convert('RGB'))}
+                    for path in image_paths
+                )
+            
+            def get_next(self):
+                return next(self._feeds, None)
+        
+        quantize_static(
+            YOLO_ONNX_PATH, YOLO_INT8_ONNX_PATH, _CalibrationReader(),
+            quant_format=QuantFormat.QDQ,
+            weight_type=QuantType.QInt8,
+            activation_type=QuantType.QUInt8,
+            per_channel=True,
+            reduce_range=True  # Avoids int16 accumulator saturation on CPUs without VNNI
+        )
+        return YOLO_INT8_ONNX_PATH
+    except Exception as e:
+        print(f"Warning: INT8 quantization of the YOLO model failed: {e}")
+        return None
+
+def _load_yolo_onnx(model):
+    """
+    Export the PyTorch YOLO model to ONNX once and load it through ONNX Runtime
+    Args:
+        model: Loaded ultralytics YOLO model
+    Returns:
+        YOLO: Model backed by the ONNX file, or None if export/loading fails
+    """
+    global _yolo_variant_tag
+    try:
+        from ultralytics import YOLO
+        if not os.path.exists(YOLO_ONNX_PATH):
+            # Dynamic axes so chunked uploads can still run as one batch
+            exported = model.export(format='onnx', imgsz=640, dynamic=True, simplify=True)
+            if exported != YOLO_ONNX_PATH:
+                os.replace(exported, YOLO_ONNX_PATH)
+        
+        # The FP32 export stays the fallback whenever INT8 is off or unavailable
+        onnx_path = (_quantize_yolo_onnx() if YOLO_INT8 else None) or YOLO_ONNX_PATH
+        if YOLO_INT8 and onnx_path != YOLO_INT8_ONNX_PATH:
+            print("Warning: INT8 requested but unavailable; using the FP32 ONNX model")
+        onnx_model = YOLO(onnx_path, task='detect')
+        _yolo_variant_tag = "-int8" if onnx_path == YOLO_INT8_ONNX_PATH else ""
+        return onnx_model
+    except Exception as e:
+        print(f"Warning: ONNX export/loading of the YOLO model failed, using PyTorch: {e}")
+        return None
+
 # YOLOv8 model cache
 @st.cache_resource
 def load_yolo_model():
     """Load and cache YOLOv8 Large model for better accuracy"""
+    global _yolo_variant_tag
     try:
         from ultralytics import YOLO
         # Use YOLOv8l (large) for better accuracy
-        model = YOLO('yolov8l.pt')  # Downloads automatically if not present
+        model = YOLO(YOLO_WEIGHTS)  # Downloads automatically if not present
+        
+        if _yolo_device() == 'cpu':
+            # Streamlit already serves sessions from several threads; leave half the
+            # cores free so intra-op threads don't oversubscribe the CPU
+            import torch
+            torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))
+            
+            # ONNX Runtime is considerably faster than eager PyTorch on CPU; the
+            # ultralytics wrapper keeps the same results API and post-processing
+            if ONNXRUNTIME_AVAILABLE:
+                model = _load_yolo_onnx(model) or model
+            elif YOLO_INT8:
+                print("Warning: INT8 requested but onnxruntime is not installed; using PyTorch")
+        elif YOLO_INT8:
+            print("Warning: INT8 quantization only applies on CPU; using PyTorch on GPU")
+        
+        # Warm up once inside the cached resource so the first real upload doesn't
+        # pay for predictor setup, weight transfer and kernel selection. This also
+        # leaves model.predictor configured with the detection settings.
+        model(np.zeros((YOLO_INPUT_SIZE, YOLO_INPUT_SIZE, 3), dtype=np.uint8), **_yolo_predict_args())
         return model
     except Exception as e:
+        _yolo_variant_tag = ""
         return None
 
 # Complete YOLO COCO animal class mapping (more comprehensive)
@@ -67,94 +301,186 @@ ANIMAL_CATEGORIES = {
     'peacock': ('Bird', 'A large bird known for the male\'s colorful, fan-shaped tail display.'),
 }
 
+# COCO class ids that count as animals (person is mapped above only so it can be excluded)
+ANIMAL_CLASS_IDS = np.array([cid for cid, name in ANIMAL_CLASSES.items() if name != 'person'])
+
+def _parse_yolo_result(result):
+    """
+    Extract animal detections from one YOLO result, sorted by confidence
+    Returns:
+        tuple: (detected_animals, confidence_scores, bounding_boxes) or (None, None, None) if no animals found
+    """
+    if result.boxes is None or len(result.boxes) == 0:
+        return None, None, None
+    
+    # Move each tensor off the device once instead of indexing box by box
+    boxes = result.boxes.cpu().numpy()
+    class_ids = boxes.cls.astype(int)
+    confidences = boxes.conf
+    
+    # Check if detected class is an animal (lower threshold for better detection)
+    keep = np.isin(class_ids, ANIMAL_CLASS_IDS) & (confidences > 0.15)  # Even lower threshold
+    if not keep.any():
+        return None, None, None
+    
+    # Return all detections, sorted by confidence
+    order = np.flatnonzero(keep)[np.argsort(-confidences[keep], kind='stable')]
+    sorted_animals = [ANIMAL_CLASSES[class_id] for class_id in class_ids[order].tolist()]
+    sorted_confidences = confidences[order].tolist()
+    sorted_boxes = boxes.xyxy[order].tolist()  # [x1, y1, x2, y2]
+    
+    return sorted_animals, sorted_confidences, sorted_boxes
+
+def _yolo_predict_args():
+    """YOLO inference settings, shared by the warm-up pass and detection calls"""
+    device = _yolo_device()
+    return dict(
+        verbose=False, conf=0.2, iou=0.5,  # Lower conf, better IoU
+        # Restricting NMS to animal classes means non-animal boxes are never
+        # materialized; NMS is per-class, so the animal boxes kept are unchanged
+        classes=ANIMAL_CLASS_IDS.tolist(),
+        # On GPU, inference runs in FP16 (half the memory traffic, tensor-core throughput)
+        device=device, half=device != 'cpu'
+    )
+
 def detect_animals_with_yolo(image):
     """
-    Use YOLOv8 Large model to detect animals in the image with better accuracy
+    Use YOLOv8 Large model to detect animals in the image with better accuracy.
+    Concurrent calls (e.g. uploads recognised on worker threads) share batched forward passes.
     Args:
         image: PIL Image object
     Returns:
         tuple: (detected_animals, confidence_scores, bounding_boxes) or (None, None, None) if no animals found
     """
+    future = concurrent.futures.Future()
+    with _yolo_pending_lock:
+        _yolo_pending.append((image, future))
+        is_leader = len(_yolo_pending) == 1
+    
+    if is_leader:
+        batch = None
+        try:
+            if not _yolo_lock.acquire(blocking=False):
+                # The model is busy; let uploads on other threads join this batch meanwhile.
+                # An idle model runs a lone image straight away
+                time.sleep(YOLO_BATCH_WAIT)
+                _yolo_lock.acquire()
+            try:
+                with _yolo_pending_lock:
+                    batch = _yolo_pending[:]
+                    del _yolo_pending[:]
+                for start in range(0, len(batch), YOLO_BATCH_MAX_SIZE):
+                    group = batch[start:start + YOLO_BATCH_MAX_SIZE]
+                    detections = detect_animals_with_yolo_batch([queued_image for queued_image, _ in group])
+                    for (_, queued_future), result in zip(group, detections):
+                        queued_future.set_result(result)
+            finally:
+                _yolo_lock.release()
+        except BaseException as e:
+            # Never leave callers on other threads blocked on a future nobody will set
+            if batch is None:
+                with _yolo_pending_lock:
+                    batch = _yolo_pending[:]
+                    del _yolo_pending[:]
+            for _, queued_future in batch:
+                if not queued_future.done():
+                    queued_future.set_exception(e)
+            raise
+    
+    return future.result()
+
+def detect_animals_with_yolo_batch(images):
+    """
+    Detect animals in several images with a single batched YOLO forward pass
+    Args:
+        images (list): PIL Image objects
+    Returns:
+        list: One (detected_animals, confidence_scores, bounding_boxes) tuple per image,
+              (None, None, None) where no animals were found
+    """
+    no_detections = [(None, None, None)] * len(images)
     try:
         model = load_yolo_model()
-        if model is None:
-            return None, None, None
+        if model is None or not images:
+            return no_detections
         
-        # Convert PIL to numpy array
-        img_array = np.array(image)
+        # Convert PIL to numpy arrays; asarray wraps PIL's exported buffer instead of copying it again
+        img_arrays = [np.asarray(image, dtype=np.uint8) for image in images]
         
         # Run inference with optimized settings for animal detection
-        results = model(img_array, verbose=False, conf=0.2, iou=0.5)  # Lower conf, better IoU
-        
-        detected_animals = []
-        confidence_scores = []
-        bounding_boxes = []
-        
-        # Parse results
-        for result in results:
-            if result.boxes is not None:
-                for box in result.boxes:
-                    class_id = int(box.cls[0])
-                    confidence = float(box.conf[0])
-                    bbox = box.xyxy[0].tolist()  # [x1, y1, x2, y2]
-                    
-                    # Check if detected class is an animal (lower threshold for better detection)
-                    if class_id in ANIMAL_CLASSES and confidence > 0.15:  # Even lower threshold
-                        animal_name = ANIMAL_CLASSES[class_id]
-                        if animal_name != 'person':  # Exclude humans
-                            detected_animals.append(animal_name)
-                            confidence_scores.append(confidence)
-                            bounding_boxes.append(bbox)
-        
-        if detected_animals:
-            # Return all detections, sorted by confidence
-            sorted_indices = sorted(range(len(confidence_scores)), key=lambda i: confidence_scores[i], reverse=True)
-            sorted_animals = [detected_animals[i] for i in sorted_indices]
-            sorted_confidences = [confidence_scores[i] for i in sorted_indices]
-            sorted_boxes = [bounding_boxes[i] for i in sorted_indices]
-            
-            return sorted_animals, sorted_confidences, sorted_boxes
+        with _yolo_lock:
+            # Reuse the predictor the warm-up pass configured with these settings,
+            # instead of re-merging the predict config on every call
+            predictor = getattr(model, 'predictor', None)
+            if predictor is not None:
+                results = predictor(img_arrays)
+            else:
+                results = model(img_arrays, **_yolo_predict_args())
         
-        return None, None, None
+        return [_parse_yolo_result(result) for result in results]
         
     except Exception as e:
-        return None, None, None
+        return no_detections
+
+def _mean_color(img_array):
+    """
+    Per-channel mean of an RGB uint8 array in one SIMD pass, without the float64
+    temporary np.mean creates
+    """
+    return np.array(cv2.mean(img_array)[:3])
 
-def analyze_animal_features(image, bbox=None):
+def _dominant_channel(img_array, min_chroma=16):
+    """
+    Index (0=R, 1=G, 2=B) of the channel that is strongest in the most pixels,
+    counted with np.bincount over a 4x-subsampled grid. Unlike comparing mean
+    colours, a few bright highlights or deep shadows can't swing the result.
+    Near-neutral pixels (spread below min_chroma) are ignored.
+    Returns:
+        int: Channel index, or None if the image is essentially grayscale
+    """
+    pixels = img_array[::4, ::4].reshape(-1, 3).astype(np.int16)
+    chroma = pixels.max(axis=1) - pixels.min(axis=1)
+    winners = pixels[chroma >= min_chroma].argmax(axis=1)
+    if winners.size == 0:
+        return None
+    return int(np.bincount(winners, minlength=3).argmax())
+
+def analyze_animal_features(image, bbox=None, img_array=None):
     """
     Analyze specific features of the detected animal to improve classification
     Args:
         image: PIL Image object
         bbox: Bounding box coordinates [x1, y1, x2, y2]
+        img_array: The image already converted to an RGB uint8 array, if available
     Returns:
         dict: Features that can help with classification
     """
     try:
-        # Crop the image to the bounding box if provided
-        if bbox:
-            x1, y1, x2, y2 = [int(coord) for coord in bbox]
-            cropped_image = image.crop((x1, y1, x2, y2))
-        else:
-            cropped_image = image
+        # Convert to numpy array for analysis (read-only view, no second copy)
+        if img_array is None:
+            img_array = np.asarray(image, dtype=np.uint8)
         
-        # Convert to numpy array for analysis
-        img_array = np.array(cropped_image)
+        # Crop to the bounding box if provided; slicing is a view, not a copy
+        if bbox:
+            x1, y1, x2, y2 = [max(0, int(coord)) for coord in bbox]
+            img_array = img_array[y1:y2, x1:x2]
         
         # Analyze color patterns (simplified)
-        avg_color = np.mean(img_array, axis=(0, 1))
+        avg_color = _mean_color(img_array)
         
         # Basic shape analysis
         height, width = img_array.shape[:2]
         aspect_ratio = width / height
         
-        # Simple pattern detection
-        gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
+        # Mean luminance is linear in the channel means, so it is derived from them
+        # (same BT.601 weights as cv2.COLOR_RGB2GRAY) instead of a grayscale pass
+        brightness = float(0.299 * avg_color[0] + 0.587 * avg_color[1] + 0.114 * avg_color[2])
         
         features = {
             'avg_color': avg_color.tolist(),
             'aspect_ratio': aspect_ratio,
             'size': (width, height),
-            'brightness': np.mean(gray)
+            'brightness': brightness
         }
         
         return features
@@ -162,7 +488,12 @@ def analyze_animal_features(image, bbox=None):
     except Exception as e:
         return {}
 
-def classify_animal_advanced(detected_animal, confidence, features=None, image=None):
+# Long-edge limit for the stripe/spot analysis in classify_animal_advanced
+BIG_CAT_ANALYSIS_MAX_SIDE = 256
+# Laplacian standard deviation (at the analysis size) above which a coat reads as spotted
+SPOT_TEXTURE_MIN_STD = 20
+
+def classify_animal_advanced(detected_animal, confidence, features=None, image=None, img_array=None):
     """
     Enhanced animal classification using YOLOv8l results, image features, and Snowflake database knowledge
     Addresses specific issues: whale->bird, leopard/wolf->lion misclassifications
@@ -171,6 +502,7 @@ def classify_animal_advanced(detected_animal, confidence, features=None, image=N
         confidence: Detection confidence
         features: Additional image features
         image: PIL Image object for additional analysis
+        img_array: The image already converted to an RGB uint8 array, if available
     Returns:
         tuple: (refined_animal_name, category, description, final_confidence)
     """
@@ -209,10 +541,10 @@ def classify_animal_advanced(detected_animal, confidence, features=None, image=N
             # Whales have very elongated horizontal shapes
             if aspect_ratio > 2.5:  # Very wide/elongated
                 # Additional color analysis for water context
-                img_array = np.array(image)
-                avg_color = np.mean(img_array, axis=(0, 1))
-                # High blue component suggests aquatic environment
-                if avg_color[2] > avg_color[0] and avg_color[2] > avg_color[1]:
+                if img_array is None:
+                    img_array = np.asarray(image, dtype=np.uint8)
+                # Mostly blue scene suggests aquatic environment
+                if _dominant_channel(img_array) == 2:
                     base_animal = 'whale'
                     confidence = 0.7  # Give reasonable confidence to whale classification
                     print("🐋 Corrected bird->whale misclassification based on shape and water context")
@@ -221,7 +553,14 @@ def classify_animal_advanced(detected_animal, confidence, features=None, image=N
     elif base_animal in ['cat', 'lion'] and confidence < 0.8:
         # Use more sophisticated analysis to distinguish big cats
         if image and features:
-            img_array = np.array(image)
+            if img_array is None:
+                img_array = np.asarray(image, dtype=np.uint8)
+            
+            # Only coarse texture statistics are needed, so run the filter chain
+            # (bilateralFilter in particular) on a downsampled copy
+            scale = BIG_CAT_ANALYSIS_MAX_SIDE / max(img_array.shape[:2])
+            if scale < 1:
+                img_array = cv2.resize(img_array, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
             
             # Analyze image characteristics for big cat distinction
             # Color pattern analysis
@@ -230,29 +569,30 @@ def classify_animal_advanced(detected_animal, confidence, features=None, image=N
             # Check for striped pattern (tiger)
             # Simple stripe detection using horizontal gradients
             try:
-                grad_x = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
-                horizontal_variance = np.var(grad_x)
+                # 16-bit gradients are exact for 8-bit input (|dx| <= 1020); meanStdDev
+                # gets the variance in one pass without squared temporaries
+                grad_x = cv2.Sobel(gray, cv2.CV_16S, 1, 0, ksize=3)
+                _, grad_std = cv2.meanStdDev(grad_x)
+                horizontal_variance = float(grad_std[0, 0]) ** 2
             except:
                 horizontal_variance = 0
             
-            # Check for spotted pattern (leopard/cheetah)
-            try:
-                # Use bilateral filter to smooth and then find contours
-                smooth = cv2.bilateralFilter(gray, 9, 75, 75)
-                thresh = cv2.threshold(smooth, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
-                contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            except:
-                contours = []
+            # Check for spotted pattern (leopard/cheetah): dense blob texture gives a
+            # high Laplacian response spread; a 3x3 Laplacian costs a fraction of
+            # the bilateral filter + Otsu + contour pass it replaces
+            laplacian = cv2.Laplacian(gray, cv2.CV_16S, ksize=3)
+            _, laplacian_std = cv2.meanStdDev(laplacian)
+            spot_texture = float(laplacian_std[0, 0])
             
             # Color analysis for environment and coat
-            avg_color = np.mean(img_array, axis=(0, 1))
+            avg_color = _mean_color(img_array)
             
             # Classification logic based on patterns and colors
             if horizontal_variance > 1000:  # High horizontal variance suggests stripes
                 base_animal = 'tiger'
                 confidence = 0.75
                 print("🐅 Detected stripe pattern - classified as tiger")
-            elif len(contours) > 20:  # Many small contours suggest spots
+            elif spot_texture > SPOT_TEXTURE_MIN_STD:  # Busy blob texture suggests spots
                 # Distinguish between leopard and cheetah
                 if avg_color[1] > 120:  # Greenish background (forest)
                     base_animal = 'leopard'
@@ -280,14 +620,14 @@ def classify_animal_advanced(detected_animal, confidence, features=None, image=N
     elif base_animal == 'lion' and confidence < 0.7:
         # Check if this might actually be a canine
         if image and features:
-            img_array = np.array(image)
-            avg_color = np.mean(img_array, axis=(0, 1))
+            if img_array is None:
+                img_array = np.asarray(image, dtype=np.uint8)
             aspect_ratio = features.get('aspect_ratio', 1.0)
             
             # Wolves are typically more elongated and in forest/snow environments
             if aspect_ratio > 1.8:  # More elongated than typical big cats
                 # Check for cooler colors (forest, snow)
-                if avg_color[2] > avg_color[0] or avg_color[1] > avg_color[0]:  # Blue or green dominant
+                if _dominant_channel(img_array) in (1, 2):  # Blue or green dominant
                     base_animal = 'wolf'
                     confidence = 0.75
                     print("🐺 Corrected lion->wolf based on elongated shape and environment")
@@ -295,8 +635,9 @@ def classify_animal_advanced(detected_animal, confidence, features=None, image=N
     # 4. Improve dog/wolf distinction
     elif base_animal == 'dog' and confidence > 0.4:
         if image and features:
-            img_array = np.array(image)
-            avg_color = np.mean(img_array, axis=(0, 1))
+            if img_array is None:
+                img_array = np.asarray(image, dtype=np.uint8)
+            avg_color = _mean_color(img_array)
             
             # Wild environment suggests wolf
             if avg_color[1] > avg_color[0] + 20:  # Significantly more green (forest)
@@ -371,158 +712,264 @@ def get_animal_info(detected_animal, confidence=None):
     # Fallback for unknown animals
     return "Unknown Animal", "Unknown", "An animal was detected but could not be classified."
 
-def process_images(uploaded_file):
+# Uploads never need decoding beyond this long edge: YOLO runs at 640px, the
+# Groq upload is capped at 1024px and texture analysis at 256px. JPEG draft mode
+# picks the smallest 1/2, 1/4 or 1/8 DCT scale that still covers it.
+DECODE_MAX_SIDE = 1280
+
+def _load_rgb_image(uploaded_file):
+    """Open an uploaded file (or pass through a PIL Image) as an RGB image."""
+    # Handle both file objects and PIL Images
+    if hasattr(uploaded_file, 'read'):
+        # It's a file object
+        image = Image.open(uploaded_file)
+        # Let libjpeg decode large JPEGs at a reduced scale (no-op for other formats)
+        image.draft('RGB', (DECODE_MAX_SIDE, DECODE_MAX_SIDE))
+        uploaded_file.seek(0)  # Reset file pointer
+    else:
+        # It's already a PIL Image
+        image = uploaded_file
+    
+    # Convert to RGB if necessary
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return image
+
+def _decode_rgb_image(uploaded_file):
+    """_load_rgb_image, with the pixel data decoded now rather than on first access"""
+    image = _load_rgb_image(uploaded_file)
+    image.load()
+    return image
+
+def _identify_with_yolo(image, detections=None, img_array=None):
     """
-    Process a single image and return animal information using enhanced YOLOv8l + advanced classification.
+    Local YOLOv8l detection + advanced classification.
     Args:
-        uploaded_file: Uploaded file object or PIL Image
+        image: RGB PIL Image
+        detections (tuple): Precomputed detect_animals_with_yolo output, e.g. from a batch
+        img_array: The image already converted to an RGB uint8 array, if available
     Returns:
-        tuple: (animal_name, animal_type, animal_description)
+        tuple: (animal_name, animal_type, animal_description), or None if not confident enough
     """
-    try:
-        # Handle both file objects and PIL Images
-        if hasattr(uploaded_file, 'read'):
-            # It's a file object
-            image = Image.open(uploaded_file)
-            uploaded_file.seek(0)  # Reset file pointer
-            filename = uploaded_file.name
-        else:
-            # It's already a PIL Image
-            image = uploaded_file
-            filename = "uploaded_image.jpg"
+    # Enhanced YOLOv8l detection with database integration
+    if detections is None:
+        detections = detect_animals_with_yolo(image)
+    detected_animals, confidences, bboxes = detections
+    
+    if detected_animals and confidences:
+        # Get the best detection
+        best_animal = detected_animals[0]
+        best_confidence = confidences[0]
+        best_bbox = bboxes[0] if bboxes else None
         
-        # Convert to RGB if necessary
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
+        # One RGB array shared by feature analysis and classification; every
+        # np.asarray(image) re-exports (copies) the full PIL buffer
+        if img_array is None:
+            img_array = np.asarray(image, dtype=np.uint8)
         
-        # Enhanced YOLOv8l detection with database integration
-        detected_animals, confidences, bboxes = detect_animals_with_yolo(image)
-            
-        # Load database knowledge for enhanced matching
-        animal_knowledge = load_animal_database_knowledge()
-        db_animals_count = len(set([v.get('name', '') for v in animal_knowledge.values() if v.get('name')]))
+        # Analyze image features for better classification
+        features = analyze_animal_features(image, best_bbox, img_array=img_array)
         
-        if detected_animals and confidences:
-            # Get the best detection
-            best_animal = detected_animals[0]
-            best_confidence = confidences[0]
-            best_bbox = bboxes[0] if bboxes else None
-            
-            # Analyze image features for better classification
-            features = analyze_animal_features(image, best_bbox)
+        # Advanced classification with image analysis
+        refined_name, category, description, final_confidence = classify_animal_advanced(
+            best_animal, best_confidence, features, image, img_array=img_array
+        )
+        
+        if final_confidence > 0.35:  # Lower threshold for accepting YOLO results
+            # Add feature-based description enhancement
+            enhanced_description = f"{description} Detected using advanced AI analysis."
             
-            # Advanced classification with image analysis
-            refined_name, category, description, final_confidence = classify_animal_advanced(
-                best_animal, best_confidence, features, image
+            return refined_name, category, enhanced_description
+    
+    return None
+
+@st.cache_resource
+def _get_groq_vision_client():
+    """Groq client for the vision fallback, built once instead of per image"""
+    # Import here to avoid issues if not available
+    from groq import Groq
+    return Groq(api_key=st.secrets.get("GROQ_API_KEY"))
+
+def _identify_with_groq(image):
+    """
+    Groq vision fallback with database enhancement, used when YOLO is not confident.
+    Returns:
+        tuple: (animal_name, animal_type, animal_description)
+    """
+    # Load database knowledge for enhanced matching
+    animal_knowledge = load_animal_database_knowledge()
+    
+    try:
+        import base64
+        
+        # Convert image to base64 for API. The vision model gains nothing from more
+        # than ~1024px, and JPEG encode time and upload size scale with pixel count
+        upload = image
+        if max(image.size) > GROQ_VISION_MAX_SIDE:
+            scale = GROQ_VISION_MAX_SIDE / max(image.size)
+            upload = image.resize(
+                (max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+                Image.LANCZOS, reducing_gap=2.0
             )
-            
-            if final_confidence > 0.35:  # Lower threshold for accepting YOLO results
-                # Add feature-based description enhancement
-                enhanced_description = f"{description} Detected using advanced AI analysis."
-                
-                # Show additional detections if available
-                if len(detected_animals) > 1:
-                    other_detections = [f"{detected_animals[i]} ({confidences[i]:.1%})" 
-                                      for i in range(1, min(3, len(detected_animals)))]
-                
-                return refined_name, category, enhanced_description
+        buffered = io.BytesIO()
+        upload.save(buffered, format="JPEG", quality=85)
+        img_base64 = base64.b64encode(buffered.getbuffer()).decode("ascii")
         
-        # Fallback to Groq API with database enhancement
+        client = _get_groq_vision_client()
         
-        try:
-            # Import here to avoid issues if not available
-            from groq import Groq
-            import base64
-            
-            # Convert image to base64 for API
-            buffered = io.BytesIO()
-            image.save(buffered, format="JPEG")
-            img_base64 = base64.b64encode(buffered.getvalue()).decode()
-            
-            # Initialize Groq client
-            client = Groq(api_key=st.secrets.get("GROQ_API_KEY"))
-            
-            # Create enhanced prompt with database knowledge
-            db_animals_list = ""
-            if animal_knowledge:
-                unique_animals = list(set([v.get('name', '') for v in animal_knowledge.values() if v.get('name')]))[:20]
-                db_animals_list = f"\n\nKnown animals in database: {', '.join(unique_animals[:20])}{'...' if len(unique_animals) > 20 else ''}"
-            
-            prompt = f"""
-            Analyze this image and identify the specific animal. Be very precise about the animal type.
-            
-            IMPORTANT: 
-            - If you see a whale or marine mammal, do NOT call it a bird
-            - If you see a big cat (lion, tiger, leopard, cheetah), be specific about which one
-            - If you see a wolf, do NOT call it a dog or lion
-            - If you see a leopard, do NOT call it a lion
-            
-            Look for these distinguishing features:
-            - Marine animals: water environment, streamlined body, fins/flippers
-            - Lions: mane (males), tawny color, pride behavior
-            - Tigers: orange with black stripes
-            - Leopards: spotted pattern, rosettes, climbing trees
-            - Cheetahs: solid spots, lean build, small head
-            - Wolves: pointed ears, longer snout, wild environment
-            
-            {db_animals_list}
-            
-            Provide exactly in this format:
-            Animal_Name|Category|Description
-            
-            Examples:
-            - Humpback Whale|Mammal|A large marine mammal found in oceans worldwide
-            - Leopard|Mammal|A spotted big cat known for its climbing ability
-            - Gray Wolf|Mammal|A wild canine and ancestor of domestic dogs
-            """
-            
-            response = client.chat.completions.create(
-                model="llama-3.2-90b-vision-preview",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{img_base64}"
-                                }
+        # Create enhanced prompt with database knowledge
+        db_animals_list = ""
+        if animal_knowledge:
+            unique_animals = list(set([v.get('name', '') for v in animal_knowledge.values() if v.get('name')]))[:20]
+            db_animals_list = f"\n\nKnown animals in database: {', '.join(unique_animals[:20])}{'...' if len(unique_animals) > 20 else ''}"
+        
+        prompt = f"""
+        Analyze this image and identify the specific animal. Be very precise about the animal type.
+        
+        IMPORTANT: 
+        - If you see a whale or marine mammal, do NOT call it a bird
+        - If you see a big cat (lion, tiger, leopard, cheetah), be specific about which one
+        - If you see a wolf, do NOT call it a dog or lion
+        - If you see a leopard, do NOT call it a lion
+        
+        Look for these distinguishing features:
+        - Marine animals: water environment, streamlined body, fins/flippers
+        - Lions: mane (males), tawny color, pride behavior
+        - Tigers: orange with black stripes
+        - Leopards: spotted pattern, rosettes, climbing trees
+        - Cheetahs: solid spots, lean build, small head
+        - Wolves: pointed ears, longer snout, wild environment
+        
+        {db_animals_list}
+        
+        Provide exactly in this format:
+        Animal_Name|Category|Description
+        
+        Examples:
+        - Humpback Whale|Mammal|A large marine mammal found in oceans worldwide
+        - Leopard|Mammal|A spotted big cat known for its climbing ability
+        - Gray Wolf|Mammal|A wild canine and ancestor of domestic dogs
+        """
+        
+        response = _groq_chat_completion(
+            client,
+            model="llama-3.2-90b-vision-preview",
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": prompt},
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": f"data:image/jpeg;base64,{img_base64}"
                             }
-                        ]
-                    }
-                ],
-                max_tokens=300,
-                temperature=0.1
-            )
-            
-            result = response.choices[0].message.content.strip()
-            
-            # Parse the response
-            if '|' in result:
-                parts = result.split('|')
-                if len(parts) >= 3:
-                    animal_name = parts[0].strip()
-                    animal_type = parts[1].strip()
-                    animal_desc = parts[2].strip()
-                    
-                    return animal_name, animal_type, f"{animal_desc} (Identified using advanced vision AI)"
-            
-            # If parsing fails, use the full response
-            return "Unknown Animal", "Unknown", f"AI Analysis: {result}"
-            
-        except Exception as groq_error:
-            pass
+                        }
+                    ]
+                }
+            ],
+            max_tokens=300,
+            temperature=0.1
+        )
         
-        # Final fallback
-        return "Unknown Animal", "Unknown", "Unable to identify the animal in this image. Please try a clearer image."
+        result = response.choices[0].message.content.strip()
         
-    except Exception as e:
-        return "Processing Error", "Unknown", f"Error processing image: {str(e)}"
+        # Parse the response
+        if '|' in result:
+            parts = result.split('|')
+            if len(parts) >= 3:
+                animal_name = parts[0].strip()
+                animal_type = parts[1].strip()
+                animal_desc = parts[2].strip()
+                
+                return animal_name, animal_type, f"{animal_desc} (Identified using advanced vision AI)"
+        
+        # If parsing fails, use the full response
+        return "Unknown Animal", "Unknown", f"AI Analysis: {result}"
+        
+    except Exception as groq_error:
+        pass
+    
+    # Final fallback
+    return "Unknown Animal", "Unknown", "Unable to identify the animal in this image. Please try a clearer image."
+
+def _prediction_cache_version():
+    """Version tag for the detector that actually loaded, not the one requested"""
+    load_yolo_model()  # Cached; sets _yolo_variant_tag on first load
+    return PREDICTION_CACHE_VERSION + _yolo_variant_tag
+
+def _prediction_cache_key(image, img_array=None):
+    """Key a decoded RGB image by model version, size and a digest of its pixels"""
+    if img_array is None:
+        img_array = np.asarray(image, dtype=np.uint8)
+    pixels = np.ascontiguousarray(img_array)
+    width, height = image.size
+    return f"{_prediction_cache_version()}:{width}x{height}:{content_digest(pixels)}"
+
+def _remember_prediction(cache_key, result):
+    """Keep a result in the bounded in-process memo, evicting the oldest entry when full"""
+    with _recent_predictions_lock:
+        _recent_predictions.pop(cache_key, None)
+        if len(_recent_predictions) >= PREDICTION_MEMORY_MAXSIZE:
+            # Dicts keep insertion order, so the first key is the least recently used
+            _recent_predictions.pop(next(iter(_recent_predictions)))
+        _recent_predictions[cache_key] = result
+
+def process_images(uploaded_file):
+    """
+    Process a single image and return animal information using enhanced YOLOv8l + advanced classification.
+    Args:
+        uploaded_file: Uploaded file object or PIL Image
+    Returns:
+        tuple: (animal_name, animal_type, animal_description)
+    """
+    try:
+        image = _load_rgb_image(uploaded_file)
+        
+        img_array = np.asarray(image, dtype=np.uint8)
+        
+        # In-process memo first (Streamlit reruns), then the disk cache
+        cache_key = _prediction_cache_key(image, img_array)
+        with _recent_predictions_lock:
+            cached = _recent_predictions.get(cache_key)
+        if cached is None and _prediction_cache is not None:
+            cached = _prediction_cache.get(cache_key)
+        if cached is not None:
+            _remember_prediction(cache_key, cached)
+            return cached
+        
+        # Enhanced YOLOv8l detection, falling back to Groq API
+        result = _identify_with_yolo(image, img_array=img_array) or _identify_with_groq(image)
+        
+        # Failed identifications are retried next time rather than cached
+        if result[0] not in ("Unknown Animal", "Processing Error"):
+            _remember_prediction(cache_key, result)
+            if _prediction_cache is not None:
+                _prediction_cache.set(cache_key, result, expire=PREDICTION_CACHE_EXPIRE)
+        return result
         
     except Exception as e:
-        st.error(f"Error processing image: {str(e)}")
-        return "Unknown", "Unknown", "Could not process image"
+        return "Processing Error", "Unknown", f"Error processing image: {str(e)}"
+
+@st.cache_resource
+def _get_groq_http_client():
+    """
+    Pooled client for the raw Groq REST calls, so uploads reuse warm connections
+    instead of a new TCP+TLS handshake per request. Uses HTTP/2 when httpx and h2
+    are installed, otherwise a keep-alive requests session.
+    """
+    if HTTPX_AVAILABLE:
+        return httpx.Client(
+            transport=httpx.HTTPTransport(
+                http2=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+            )
+        )
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=20))
+    return session
 
 def enhance_description_with_groq(animal_name, image, filename):
     """
@@ -535,7 +982,6 @@ def enhance_description_with_groq(animal_name, image, filename):
         str: Enhanced description or None if failed
     """
     try:
-        import requests
         from utils.llama_utils import GROQ_API_URL, HEADERS, LLAMA_MODEL
         
         width, height = image.size
@@ -554,7 +1000,7 @@ Focus on unique characteristics, habitat, or behavior. Make it engaging and info
             "max_tokens": 100
         }
 
-        response = requests.post(GROQ_API_URL, headers=HEADERS, json=body)
+        response = _get_groq_http_client().post(GROQ_API_URL, headers=HEADERS, json=body, timeout=30)
         
         if response.status_code == 200:
             result = response.json()
@@ -565,6 +1011,43 @@ Focus on unique characteristics, habitat, or behavior. Make it engaging and info
     except Exception:
         return None
 
+# Filename hints for fallback_animal_detection, in precedence order (first row wins)
+FILENAME_ANIMAL_HINTS = [
+    (('lion', 'cat', 'feline'), ("Lion", "Mammal", "A powerful big cat known as the king of the jungle.")),
+    (('elephant', 'trunk'), ("Elephant", "Mammal", "A large mammal with a trunk and big ears.")),
+    (('giraffe', 'tall'), ("Giraffe", "Mammal", "The tallest mammal in the world with a long neck.")),
+    (('bird', 'eagle', 'hawk', 'owl'), ("Eagle", "Bird", "A powerful bird of prey with excellent eyesight.")),
+    (('dog', 'canine', 'wolf'), ("Wolf", "Mammal", "A wild canine that lives in packs.")),
+    (('bear', 'panda'), ("Bear", "Mammal", "A large, powerful mammal with thick fur.")),
+    (('tiger', 'stripe'), ("Tiger", "Mammal", "A large striped cat native to Asia.")),
+    (('zebra', 'stripe'), ("Zebra", "Mammal", "A striped horse-like animal from Africa.")),
+    (('monkey', 'ape', 'primate'), ("Monkey", "Mammal", "An intelligent primate that lives in trees.")),
+]
+
+# Keyword -> index of the first row that lists it
+_FILENAME_HINT_RANK = {}
+for _rank, (_keywords, _animal) in enumerate(FILENAME_ANIMAL_HINTS):
+    for _keyword in _keywords:
+        _FILENAME_HINT_RANK.setdefault(_keyword, _rank)
+
+# One scan over the filename; the zero-width lookahead reports overlapping keywords
+_FILENAME_HINT_PATTERN = re.compile(
+    '(?=(' + '|'.join(re.escape(kw) for kw in sorted(_FILENAME_HINT_RANK, key=len, reverse=True)) + '))'
+)
+
+def match_filename_animal(filename_lower):
+    """
+    Match a lower-cased filename against FILENAME_ANIMAL_HINTS.
+    Args:
+        filename_lower (str): Lower-cased filename
+    Returns:
+        tuple: (animal_name, animal_type, description) of the first matching row, or None
+    """
+    ranks = [_FILENAME_HINT_RANK[m.group(1)] for m in _FILENAME_HINT_PATTERN.finditer(filename_lower)]
+    if not ranks:
+        return None
+    return FILENAME_ANIMAL_HINTS[min(ranks)][1]
+
 def fallback_animal_detection(image, filename):
     """
     Fallback method using filename analysis and Groq API
@@ -575,7 +1058,6 @@ def fallback_animal_detection(image, filename):
         tuple: (animal_name, animal_type, description)
     """
     try:
-        import requests
         from utils.llama_utils import GROQ_API_URL, HEADERS, LLAMA_MODEL
         
         width, height = image.size
@@ -583,22 +1065,9 @@ def fallback_animal_detection(image, filename):
         filename_lower = filename.lower()
         
         # Smart animal detection based on filename
-        filename_animals = {
-            ['lion', 'cat', 'feline']: ("Lion", "Mammal", "A powerful big cat known as the king of the jungle."),
-            ['elephant', 'trunk']: ("Elephant", "Mammal", "A large mammal with a trunk and big ears."),
-            ['giraffe', 'tall']: ("Giraffe", "Mammal", "The tallest mammal in the world with a long neck."),
-            ['bird', 'eagle', 'hawk', 'owl']: ("Eagle", "Bird", "A powerful bird of prey with excellent eyesight."),
-            ['dog', 'canine', 'wolf']: ("Wolf", "Mammal", "A wild canine that lives in packs."),
-            ['bear', 'panda']: ("Bear", "Mammal", "A large, powerful mammal with thick fur."),
-            ['tiger', 'stripe']: ("Tiger", "Mammal", "A large striped cat native to Asia."),
-            ['zebra', 'stripe']: ("Zebra", "Mammal", "A striped horse-like animal from Africa."),
-            ['monkey', 'ape', 'primate']: ("Monkey", "Mammal", "An intelligent primate that lives in trees."),
-        }
-        
-        # Check filename for animal hints
-        for keywords, (name, type_, desc) in filename_animals.items():
-            if any(word in filename_lower for word in keywords):
-                return name, type_, desc
+        filename_match = match_filename_animal(filename_lower)
+        if filename_match:
+            return filename_match
         
         # Use Groq API for intelligent guess based on image properties
         prompt = f"""Based on an image with dimensions {width}x{height} (aspect ratio {aspect_ratio:.2f}) and filename '{filename}', 
@@ -619,7 +1088,7 @@ Description: [brief educational description in one sentence]"""
             "max_tokens": 150
         }
 
-        response = requests.post(GROQ_API_URL, headers=HEADERS, json=body)
+        response = _get_groq_http_client().post(GROQ_API_URL, headers=HEADERS, json=body, timeout=30)
         
         if response.status_code == 200:
             result = response.json()
@@ -647,54 +1116,227 @@ Description: [brief educational description in one sentence]"""
     except Exception:
         return "Lion", "Mammal", "A powerful big cat known as the king of the jungle."
 
-def is_duplicate_image(uploaded_file):
+def content_digest(image_bytes):
+    """
+    Hash raw image bytes for exact-duplicate detection.
+    Dedup needs no cryptographic strength, so the non-cryptographic XXH3-128
+    is preferred, then BLAKE3, falling back to BLAKE2b.
+    Args:
+        image_bytes: Raw file contents (bytes or any buffer, e.g. a memoryview)
+    Returns:
+        str: Hex digest
+    """
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_128_hexdigest(image_bytes)
+    if BLAKE3_AVAILABLE:
+        return blake3.blake3(image_bytes).hexdigest()
+    return hashlib.blake2b(image_bytes).hexdigest()
+
+# Read size for hashing file objects that aren't already in memory
+DIGEST_CHUNK_SIZE = 128 * 1024
+
+def file_content_digest(file_obj):
+    """
+    content_digest of a file object's contents, streamed in DIGEST_CHUNK_SIZE
+    chunks so the whole file is never held in memory at once. The file pointer
+    is reset to the start afterwards.
+    Args:
+        file_obj: Readable binary file object
+    Returns:
+        str: Hex digest, identical to content_digest of the full contents
+    """
+    if XXHASH_AVAILABLE:
+        hasher = xxhash.xxh3_128()
+    elif BLAKE3_AVAILABLE:
+        hasher = blake3.blake3()
+    else:
+        hasher = hashlib.blake2b()
+    file_obj.seek(0)
+    for chunk in iter(lambda: file_obj.read(DIGEST_CHUNK_SIZE), b""):
+        hasher.update(chunk)
+    file_obj.seek(0)  # Reset file pointer
+    return hasher.hexdigest()
+
+# Files at least this large (RAW/TIFF exports) are fingerprinted from sampled
+# windows instead of being read in full for the session duplicate check
+SPARSE_DIGEST_MIN_SIZE = 16 * 1024 * 1024
+SPARSE_DIGEST_WINDOW = 64 * 1024
+
+def sparse_file_digest(file_obj):
+    """
+    Fingerprint a large file from its size plus head, middle and tail windows.
+    Only a few hundred KB are read; for image dedup, two distinct files of the
+    same size that also agree on all three windows are not a practical concern.
+    Args:
+        file_obj: Readable, seekable binary file object
+    Returns:
+        str: Hex digest, prefixed with 'sparse:' so it never equals a full content_digest
+    """
+    file_obj.seek(0, os.SEEK_END)
+    size = file_obj.tell()
+    sample = bytearray(size.to_bytes(8, 'little'))
+    for offset in (0, size // 2, max(0, size - SPARSE_DIGEST_WINDOW)):
+        file_obj.seek(offset)
+        sample += file_obj.read(SPARSE_DIGEST_WINDOW)
+    file_obj.seek(0)  # Reset file pointer
+    return "sparse:" + content_digest(sample)
+
+def is_duplicate_image(uploaded_file, digest=None):
     """
     Check if an image has already been processed by checking Snowflake database.
     Args:
         uploaded_file: Uploaded file object
+        digest (str): content_digest of uploaded_file if already computed; avoids re-reading the file
     Returns:
         bool: True if duplicate, False otherwise
     """
     try:
-        from utils.data_utils import get_snowflake_connection
+        from utils.data_utils import filename_exists
         
-        # Check if filename exists in Snowflake database
-        conn = get_snowflake_connection()
-        if not conn:
+        # Check if filename exists in Snowflake database (cached filename set)
+        exists = filename_exists(uploaded_file.name)
+        if exists is None:
             # If Snowflake is not configured, fall back to session-based duplicate detection
-            file_content = uploaded_file.read()
-            uploaded_file.seek(0)  # Reset file pointer
-            file_hash = hashlib.md5(file_content).hexdigest()
-            
-            if file_hash in processed_images:
-                return True
-            else:
-                processed_images.add(file_hash)
-                return False
-            
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM animal_insight_data WHERE filename = %s", (uploaded_file.name,))
-        count = cursor.fetchone()[0]
-        cursor.close()
-        conn.close()
+            return _is_duplicate_in_session(uploaded_file, digest)
         
-        return count > 0
+        return exists
         
     except Exception as e:
         # Fall back to session-based duplicate detection if database fails
         try:
-            file_content = uploaded_file.read()
-            uploaded_file.seek(0)  # Reset file pointer
-            file_hash = hashlib.md5(file_content).hexdigest()
-            
-            if file_hash in processed_images:
-                return True
-            else:
-                processed_images.add(file_hash)
-                return False
+            return _is_duplicate_in_session(uploaded_file, digest)
         except:
             return False
 
+def _is_duplicate_in_session(uploaded_file, digest=None):
+    """Exact-content duplicate check against images seen in this session."""
+    if digest is None:
+        if hasattr(uploaded_file, 'getbuffer'):
+            # Hash the in-memory upload buffer directly, without copying or moving the file pointer
+            digest = content_digest(uploaded_file.getbuffer())
+        else:
+            uploaded_file.seek(0, os.SEEK_END)
+            size = uploaded_file.tell()
+            uploaded_file.seek(0)
+            if size >= SPARSE_DIGEST_MIN_SIZE:
+                digest = sparse_file_digest(uploaded_file)
+            else:
+                digest = file_content_digest(uploaded_file)
+    
+    if digest in processed_images:
+        return True
+    processed_images.add(digest)
+    return False
+
+def compute_perceptual_hash(image):
+    """
+    Compute a 64-bit perceptual hash (pHash) of an image.
+    Args:
+        image: Decoded PIL Image, or raw image bytes
+    Returns:
+        int: Hash value, or None if imagehash is unavailable or the image cannot be read
+    """
+    if not IMAGEHASH_AVAILABLE:
+        return None
+    try:
+        if isinstance(image, (bytes, bytearray)):
+            image = Image.open(io.BytesIO(image))
+        bits = imagehash.phash(image).hash.flatten()
+        return int(np.packbits(bits).view('>u8')[0])
+    except Exception:
+        return None
+
+def _load_perceptual_hashes():
+    """Load the persisted hash store once per process (caller holds the lock)."""
+    global _perceptual_hashes, _perceptual_filenames
+    if _perceptual_hashes is None:
+        try:
+            with np.load(PERCEPTUAL_HASH_STORE) as store:
+                _perceptual_hashes = store['hashes'].astype(np.uint64)
+                _perceptual_filenames = store['filenames'].astype(object)
+        except Exception:
+            _perceptual_hashes = np.empty(0, dtype=np.uint64)
+            _perceptual_filenames = np.empty(0, dtype=object)
+
+if NUMBA_AVAILABLE:
+    _M1 = np.uint64(0x5555555555555555)
+    _M2 = np.uint64(0x3333333333333333)
+    _M4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+    _H01 = np.uint64(0x0101010101010101)
+
+    @numba.njit(parallel=True, cache=True)
+    def _hamming_distances(hashes, query):
+        """Bit distance from query to every stored hash (SWAR popcount, lowered to POPCNT)."""
+        distances = np.empty(hashes.size, dtype=np.int64)
+        for i in numba.prange(hashes.size):
+            x = hashes[i] ^ query
+            x = x - ((x >> np.uint64(1)) & _M1)
+            x = (x & _M2) + ((x >> np.uint64(2)) & _M2)
+            x = (x + (x >> np.uint64(4))) & _M4
+            distances[i] = np.int64((x * _H01) >> np.uint64(56))
+        return distances
+else:
+    def _hamming_distances(hashes, query):
+        """Bit distance from query to every stored hash (vectorised NumPy popcount)."""
+        diff = hashes ^ query
+        return np.unpackbits(diff.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+def find_near_duplicate(perceptual_hash, filename=None, max_distance=NEAR_DUPLICATE_MAX_DISTANCE):
+    """
+    Find a previously saved image whose perceptual hash is within max_distance bits.
+    Args:
+        perceptual_hash (int): Hash from compute_perceptual_hash
+        filename (str): Name of the image being checked; its own earlier entries are ignored
+            so re-running recognition on the same upload does not flag it
+        max_distance (int): Maximum Hamming distance treated as the same image
+    Returns:
+        str: Filename of the closest match, or None if there is no near-duplicate
+    """
+    if perceptual_hash is None:
+        return None
+    with _perceptual_lock:
+        _load_perceptual_hashes()
+        if not len(_perceptual_hashes):
+            return None
+        distances = _hamming_distances(_perceptual_hashes, np.uint64(perceptual_hash))
+        if filename is not None:
+            distances[_perceptual_filenames == filename] = max_distance + 1
+        best = int(distances.argmin())
+        if distances[best] <= max_distance:
+            return _perceptual_filenames[best]
+        return None
+
+def remember_perceptual_hash(perceptual_hash, filename):
+    """
+    Record a saved image's perceptual hash in the persisted store, replacing any
+    earlier hash stored under the same filename.
+    Args:
+        perceptual_hash (int): Hash from compute_perceptual_hash
+        filename (str): Filename the image was saved under
+    """
+    global _perceptual_hashes, _perceptual_filenames
+    if perceptual_hash is None:
+        return
+    with _perceptual_lock:
+        _load_perceptual_hashes()
+        existing = np.flatnonzero(_perceptual_filenames == filename)
+        if existing.size:
+            if _perceptual_hashes[existing[0]] == np.uint64(perceptual_hash):
+                return
+            _perceptual_hashes[existing[0]] = np.uint64(perceptual_hash)
+        else:
+            _perceptual_hashes = np.append(_perceptual_hashes, np.uint64(perceptual_hash))
+            _perceptual_filenames = np.append(_perceptual_filenames, np.array([filename], dtype=object))
+        try:
+            os.makedirs(os.path.dirname(PERCEPTUAL_HASH_STORE), exist_ok=True)
+            np.savez(PERCEPTUAL_HASH_STORE, hashes=_perceptual_hashes,
+                     filenames=_perceptual_filenames.astype(str))
+        except OSError:
+            pass
+
+# Result for an image whose chunk ran out of time before it was identified
+CHUNK_TIMEOUT_RESULT = ("Processing Error", "Unknown", "Timed out")
+
 def process_images_in_chunks(uploaded_files, chunk_size=5, timeout=30):
     """
     Process images in chunks with a timeout for each chunk.
@@ -703,7 +1345,8 @@ def process_images_in_chunks(uploaded_files, chunk_size=5, timeout=30):
         chunk_size (int): Number of images to process per chunk.
         timeout (int): Timeout in seconds for each chunk.
     Returns:
-        list: List of results for all images.
+        list: One result per uploaded file, in upload order; images not identified
+            within their chunk's timeout get CHUNK_TIMEOUT_RESULT.
     """
     results = []
 
@@ -712,21 +1355,89 @@ def process_images_in_chunks(uploaded_files, chunk_size=5, timeout=30):
 
     for chunk in chunks:
         start_time = time.time()
-        chunk_results = []
-        for uploaded_file in chunk:
-            if time.time() - start_time > timeout:
-                break
-            # Call the process_images function defined earlier in this file
-            result = process_images(uploaded_file)
-            chunk_results.append(result)
-        results.extend(chunk_results)
+        chunk_results = [None] * len(chunk)
+        images = {}
+        # Decode the chunk's images concurrently (PIL releases the GIL while
+        # decoding); images not decoded within the chunk's timeout are recorded
+        # as timed out and skip identification
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(chunk))
+        future_to_idx = {
+            executor.submit(_decode_rgb_image, uploaded_file): idx
+            for idx, uploaded_file in enumerate(chunk)
+        }
+        done, not_done = concurrent.futures.wait(future_to_idx, timeout=timeout)
+        for future in done:
+            idx = future_to_idx[future]
+            try:
+                images[idx] = future.result()
+            except Exception as e:
+                chunk_results[idx] = ("Processing Error", "Unknown", f"Error processing image: {str(e)}")
+        for future in not_done:
+            idx = future_to_idx[future]
+            print(f"Warning: Decoding {getattr(chunk[idx], 'name', idx)} timed out")
+            chunk_results[idx] = CHUNK_TIMEOUT_RESULT
+        executor.shutdown(wait=False, cancel_futures=True)
+        # Keep upload order so batched detections line up with their images
+        images = dict(sorted(images.items()))
+
+        # One batched YOLO forward pass for the whole chunk. The shared model is
+        # not thread-safe, but classification only reads the precomputed
+        # detections, and its OpenCV/NumPy work releases the GIL, so the
+        # per-image feature analysis runs on a thread pool
+        batch_detections = detect_animals_with_yolo_batch(list(images.values()))
+        groq_pending = []
+        if images:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, len(images))) as executor:
+                future_to_idx = {
+                    executor.submit(_identify_with_yolo, image, detections): idx
+                    for (idx, image), detections in zip(images.items(), batch_detections)
+                }
+                for future in concurrent.futures.as_completed(future_to_idx):
+                    idx = future_to_idx[future]
+                    try:
+                        chunk_results[idx] = future.result()
+                    except Exception as e:
+                        chunk_results[idx] = ("Processing Error", "Unknown", f"Error processing image: {str(e)}")
+                        continue
+                    if chunk_results[idx] is None:
+                        groq_pending.append((idx, images[idx]))
+
+        # Network-bound Groq fallbacks for the chunk run concurrently, bounded by
+        # whatever is left of the chunk's time budget
+        if groq_pending:
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(groq_pending))
+            future_to_idx = {
+                executor.submit(_identify_with_groq, image): idx
+                for idx, image in groq_pending
+            }
+            remaining = max(0.0, timeout - (time.time() - start_time))
+            done, not_done = concurrent.futures.wait(future_to_idx, timeout=remaining)
+            for future in done:
+                try:
+                    chunk_results[future_to_idx[future]] = future.result()
+                except Exception as e:
+                    chunk_results[future_to_idx[future]] = (
+                        "Processing Error", "Unknown", f"Error processing image: {str(e)}"
+                    )
+            for future in not_done:
+                idx = future_to_idx[future]
+                print(f"Warning: Groq fallback for {getattr(chunk[idx], 'name', idx)} timed out")
+                chunk_results[idx] = CHUNK_TIMEOUT_RESULT
+            # Don't block on the stragglers
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        # Keep one entry per file so results[i] always belongs to uploaded_files[i]
+        results.extend(CHUNK_TIMEOUT_RESULT if result is None else result for result in chunk_results)
 
     return results
 
-# Cache for database animal knowledge to avoid repeated queries
-@st.cache_data(ttl=3600)  # Cache for 1 hour
+# Cache for database animal knowledge to avoid repeated queries. A shared
+# resource rather than cache_data: cache_data would unpickle a fresh copy of the
+# whole knowledge base on every lookup (once per classified image); callers
+# only read it.
+@st.cache_resource(ttl=3600, show_spinner=False)  # Cache for 1 hour
 def load_animal_database_knowledge():
-    """Load and cache animal knowledge from Snowflake database"""
+    """Load and cache animal knowledge from Snowflake database (treat as read-only)"""
     try:
         from utils.data_utils import get_animal_database_knowledge
         return get_animal_database_knowledge()
@@ -1,6 +1,10 @@
 import streamlit as st
 import requests
 import os
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from utils.llm_cache import llm_cache, CACHEABLE_MAX_TEMPERATURE
 
 GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
 
@@ -12,7 +16,59 @@ HEADERS = {
 # Use LLaMA model via Groq (llama3-8b or llama3-70b)
 LLAMA_MODEL = "llama3-70b-8192"
 
+# (connect, read) timeouts in seconds for Groq requests
+GROQ_TIMEOUT = (3, 30)
+
+# Upper bound on concurrent Groq requests for batch helpers (within the session pool size)
+GROQ_MAX_CONCURRENCY = 8
+
+# Shared keep-alive session so repeated calls reuse one TLS connection to Groq.
+# Completions have no side effects, so POSTs are safe to retry on rate limits and 5xx.
+_SESSION = requests.Session()
+_SESSION.headers.update(HEADERS)
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"POST"})
+    )
+))
+
+def _normalize_animal_name(name):
+    """
+    Canonicalize an animal name so case and spacing variants ("Lion", " lion ")
+    build the same prompt and therefore share one cached response
+    """
+    return " ".join(str(name).split()).lower()
+
+def _chat_completion(body):
+    """
+    Post a chat completion to Groq and return the message text
+    
+    Low-temperature requests are answered from the shared LLM cache when the
+    exact same request was made before, so repeated animals cost no API call.
+    """
+    cache_key = None
+    if body["temperature"] <= CACHEABLE_MAX_TEMPERATURE:
+        cache_key = llm_cache.make_key(**body)
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    
+    response = _SESSION.post(GROQ_API_URL, json=body, timeout=GROQ_TIMEOUT)
+    response.raise_for_status()
+    result = response.json()
+    content = result["choices"][0]["message"]["content"]
+    
+    if cache_key:
+        llm_cache.set(cache_key, content)
+    return content
+
 def generate_animal_facts(animal_name):
+    animal_name = _normalize_animal_name(animal_name)
     prompt = (
         f"Give me an interesting educational fact about a {animal_name}. "
         "Make it child-friendly, curious, and one or two sentences max."
@@ -24,21 +80,38 @@ def generate_animal_facts(animal_name):
             {"role": "system", "content": "You are a fun and educational zoologist."},
             {"role": "user", "content": prompt}
         ],
-        "temperature": 0.7
+        "temperature": 0.3  # Low enough for the answer to be cached per animal
     }
 
     try:
-        response = requests.post(
-            GROQ_API_URL,
-            headers=HEADERS,
-            json=body
-        )
-        result = response.json()
-        return result["choices"][0]["message"]["content"]
+        return _chat_completion(body)
     except Exception as e:
         return f"Couldn't fetch fun fact: {str(e)}"
 
+def generate_animal_facts_batch(animal_names):
+    """
+    Fetch facts for several animals concurrently
+    
+    Args:
+        animal_names: Iterable of animal names
+    
+    Returns:
+        dict: Fact text keyed by each input name, in input order
+    """
+    animal_names = list(animal_names)
+    # Variants of the same animal share one request
+    unique_names = list(dict.fromkeys(_normalize_animal_name(name) for name in animal_names))
+    if not unique_names:
+        return {}
+    
+    workers = min(GROQ_MAX_CONCURRENCY, len(unique_names))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        facts = dict(zip(unique_names, executor.map(generate_animal_facts, unique_names)))
+    
+    return {name: facts[_normalize_animal_name(name)] for name in animal_names}
+
 def generate_description(animal):
+    animal = _normalize_animal_name(animal)
     prompt = (
         f"Write a detailed description of a {animal}, including appearance, behavior, and habitat."
     )
@@ -49,16 +122,10 @@ def generate_description(animal):
             {"role": "system", "content": "You describe animals in detail for educational purposes."},
             {"role": "user", "content": prompt}
         ],
-        "temperature": 0.7
+        "temperature": 0.3  # Low enough for the answer to be cached per animal
     }
 
     try:
-        response = requests.post(
-            GROQ_API_URL,
-            headers=HEADERS,
-            json=body
-        )
-        result = response.json()
-        return result["choices"][0]["message"]["content"]
+        return _chat_completion(body)
     except Exception as e:
         return f"Couldn't fetch description: {str(e)}"
@@ -0,0 +1,86 @@
+# utils/llm_cache.py
+
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+try:
+    from diskcache import Cache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Calls sampled above this temperature are treated as non-deterministic and never cached
+CACHEABLE_MAX_TEMPERATURE = 0.3
+
+class LLMCache:
+    """Exact-match cache of parsed LLM responses keyed on the full request"""
+
+    def __init__(self, directory: str = ".cache/naturetrace_llm", ttl: int = 86400):
+        self.ttl = ttl
+        if DISKCACHE_AVAILABLE:
+            self._backend = Cache(directory)
+        else:
+            # In-process fallback; entries do not expire but are bounded by the session
+            self._backend = {}
+            self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict], temperature: float, max_tokens: Optional[int] = None,
+                 **options: Any) -> str:
+        """
+        Build a stable key for a chat completion request
+
+        Args:
+            model: Model name
+            messages: Chat messages sent to the model
+            temperature: Sampling temperature
+            max_tokens: Completion token limit, if the request sets one
+            **options: Any other request parameters that affect the output (e.g. response_format)
+
+        Returns:
+            Hex digest of the canonical request (XXH3-128, or SHA-256 without xxhash)
+        """
+        payload = json.dumps(
+            {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens, **options},
+            sort_keys=True
+        ).encode("utf-8")
+        # Keys only need equality, not cryptographic strength
+        if XXHASH_AVAILABLE:
+            return xxhash.xxh3_128_hexdigest(payload)
+        return hashlib.sha256(payload).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached response for key, or None on a miss"""
+        try:
+            if DISKCACHE_AVAILABLE:
+                return self._backend.get(key)
+            with self._lock:
+                return self._backend.get(key)
+        except Exception as e:
+            logger.warning(f"LLM cache read failed: {e}")
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a parsed response under key"""
+        try:
+            if DISKCACHE_AVAILABLE:
+                self._backend.set(key, value, expire=self.ttl)
+            else:
+                with self._lock:
+                    self._backend[key] = value
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+# Global instance
+llm_cache = LLMCache()